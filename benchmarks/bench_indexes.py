@@ -0,0 +1,62 @@
+"""
+Times the hot Entry/Measure queries with the composite indexes, then again with only the
+single-column foreign key indexes that preceded them.
+"""
+
+from django.db import connection
+
+from benchmarks.common import best_of, create_category, create_history, test_database
+from frog_api.models import Category, Entry, Measure
+from frog_api.readers import read_entries
+
+NUM_CATEGORIES = 20
+ENTRIES_PER_CATEGORY = 5000
+
+
+def time_queries(category: Category) -> dict[str, float]:
+    history = Entry.objects.filter(category=category).order_by("-timestamp", "-id")
+    last_entry = history.last()
+    assert last_entry is not None
+
+    return {
+        "full history": best_of(lambda: read_entries(history)),
+        "page of 100": best_of(lambda: read_entries(history[:100])),
+        "latest entry": best_of(lambda: history.first(), repeat=200),
+        "measure by type": best_of(
+            lambda: list(Measure.objects.filter(entry=last_entry, type="asm")),
+            repeat=200,
+        ),
+    }
+
+
+def use_foreign_key_indexes() -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("DROP INDEX entry_category_timestamp")
+        cursor.execute("DROP INDEX measure_entry_type")
+        cursor.execute("CREATE INDEX entry_category_id ON frog_api_entry (category_id)")
+        cursor.execute("CREATE INDEX measure_entry_id ON frog_api_measure (entry_id)")
+        cursor.execute("ANALYZE")
+
+
+def main() -> None:
+    with test_database():
+        categories = [create_category(f"bench{i}") for i in range(NUM_CATEGORIES)]
+        for category in categories:
+            create_history(category, ENTRIES_PER_CATEGORY)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        after = time_queries(categories[0])
+        use_foreign_key_indexes()
+        before = time_queries(categories[0])
+
+        print(f"{NUM_CATEGORIES} categories of {ENTRIES_PER_CATEGORY} entries")
+        print(f"{'query':<20} {'before':>12} {'after':>12}")
+        for name in after:
+            print(
+                f"{name:<20} {before[name] * 1000:>9.3f} ms {after[name] * 1000:>9.3f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Times uploading a backfill of entries through VersionDataView.create_entries, saving each entry and
+measure with its own INSERT as before, and then with batched bulk inserts.
+"""
+
+from itertools import count
+from typing import Any
+from unittest import mock
+
+from benchmarks.common import (
+    MEASURE_TYPES,
+    best_of,
+    create_category,
+    report,
+    test_database,
+)
+from frog_api.ingest import OnConflict
+from frog_api.models import Entry, Measure
+from frog_api.views.data import VersionDataView
+
+NUM_ENTRIES = 10000
+
+
+def save_one_by_one(
+    entries: list[Entry], measures: list[Measure], on_conflict: OnConflict
+) -> list[Entry]:
+    for entry in entries:
+        entry.save()
+    for measure in measures:
+        measure.save()
+    return []
+
+
+def main() -> None:
+    with test_database():
+        category = create_category()
+        category.version.project.auth_key = "bench"
+        category.version.project.save()
+
+        runs = count()
+
+        def upload() -> None:
+            # Every run uploads new commits
+            start = next(runs) * NUM_ENTRIES
+            data: dict[str, Any] = {
+                "api_key": "bench",
+                "entries": [
+                    {
+                        "timestamp": start + i,
+                        "git_hash": f"{start + i:040x}",
+                        "categories": {
+                            "default": {type: i for type in MEASURE_TYPES},
+                        },
+                    }
+                    for i in range(NUM_ENTRIES)
+                ],
+            }
+            VersionDataView.create_entries(data, "bench", "us")
+
+        with mock.patch("frog_api.views.data.bulk_create_entries", save_one_by_one):
+            one_by_one = best_of(upload, repeat=2)
+        bulk = best_of(upload, repeat=2)
+
+        print(
+            f"Uploading {NUM_ENTRIES} entries with {len(MEASURE_TYPES)} measures each"
+        )
+        report("one INSERT per row", one_by_one, one_by_one)
+        report("bulk_create", bulk, one_by_one)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares the peak memory of uploading a backfill as one JSON document, parsed and validated whole,
+and as NDJSON, read and written a chunk at a time. Both peaks include the encoded request body.
+"""
+
+import json
+import tracemalloc
+from io import BytesIO
+from itertools import count
+from typing import Callable, Iterator
+
+from benchmarks.common import MEASURE_TYPES, create_category, test_database
+from frog_api.views.data import VersionDataView
+
+NUM_ENTRIES = 20000
+
+
+def entries(start: int) -> Iterator[dict[str, object]]:
+    for i in range(start, start + NUM_ENTRIES):
+        yield {
+            "timestamp": i,
+            "git_hash": f"{i:040x}",
+            "categories": {"default": {type: i for type in MEASURE_TYPES}},
+        }
+
+
+def peak_mib(func: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    with test_database():
+        category = create_category()
+        category.version.project.auth_key = "bench"
+        category.version.project.save()
+
+        runs = count()
+
+        def upload_json() -> None:
+            # As the view would get it, once the request body has been parsed
+            body = json.dumps(
+                {"api_key": "bench", "entries": list(entries(next(runs) * NUM_ENTRIES))}
+            ).encode()
+            VersionDataView.create_entries(json.loads(body), "bench", "us")
+
+        def upload_ndjson() -> None:
+            lines = [{"api_key": "bench"}, *entries(next(runs) * NUM_ENTRIES)]
+            body = b"\n".join(json.dumps(line).encode() for line in lines)
+            del lines
+            VersionDataView.create_entries_from_lines(BytesIO(body), "bench", "us")
+
+        print(
+            f"Uploading {NUM_ENTRIES} entries with {len(MEASURE_TYPES)} measures each"
+        )
+        print(f"{'JSON':<40} {peak_mib(upload_json):>10.1f} MiB peak")
+        print(f"{'NDJSON':<40} {peak_mib(upload_ndjson):>10.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
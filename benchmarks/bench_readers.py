@@ -0,0 +1,40 @@
+"""
+Compares reading a category's full history through EntrySerializer and through frog_api.readers.
+"""
+
+from benchmarks.common import (
+    best_of,
+    create_category,
+    create_history,
+    report,
+    test_database,
+)
+from frog_api.models import Entry
+from frog_api.readers import read_entries
+from frog_api.serializers.model_serializers import EntrySerializer
+
+NUM_ENTRIES = 50000
+
+
+def main() -> None:
+    with test_database():
+        category = create_category()
+        create_history(category, NUM_ENTRIES)
+
+        entries = Entry.objects.filter(category=category).order_by("-timestamp", "-id")
+
+        serializer = best_of(
+            lambda: EntrySerializer(
+                entries.prefetch_related("measures"), many=True
+            ).data,
+            repeat=3,
+        )
+        reader = best_of(lambda: read_entries(entries), repeat=3)
+
+        print(f"Reading {NUM_ENTRIES} entries")
+        report("EntrySerializer", serializer, serializer)
+        report("read_entries", reader, serializer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Times cache hits for a category's full history, served from the cached entries (unpickled and
+rendered to JSON on every request), then from the cached rendered response, and then from its
+cached gzip-compressed version.
+"""
+
+from typing import Optional
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks.common import (
+    best_of,
+    create_category,
+    create_history,
+    report,
+    test_database,
+)
+
+NUM_ENTRIES = 20000
+
+
+def main() -> None:
+    with test_database():
+        category = create_category()
+        create_history(category, NUM_ENTRIES)
+
+        client = Client()
+        url = reverse("category-data", args=["bench", "us", "default"])
+
+        def get(headers: Optional[dict[str, str]] = None) -> int:
+            response = client.get(url, {"mode": "all"}, headers=headers)
+            assert response.status_code == 200
+            return len(response.content)
+
+        cache.clear()
+        with mock.patch(
+            "frog_api.conditional.get_response_cache", return_value=None
+        ), mock.patch("frog_api.conditional.set_response_cache"):
+            get()
+            rendered = best_of(get, repeat=10)
+
+        cache.clear()
+        size = get()
+        cached = best_of(get, repeat=10)
+
+        def get_gzip() -> int:
+            return get({"Accept-Encoding": "gzip"})
+
+        compressed_size = get_gzip()
+        compressed = best_of(get_gzip, repeat=10)
+
+        print(f"Cache hits for {NUM_ENTRIES} entries")
+        report("cached entries, rendered per request", rendered, rendered)
+        report("cached response", cached, rendered)
+        report("cached gzip response", compressed, rendered)
+        print(f"{size} bytes, {compressed_size} gzip-compressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Shared setup for the benchmarks. Each benchmark runs against a throwaway test database, e.g.
+
+    poetry run python -m benchmarks.bench_readers
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "frogress.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from frog_api.models import Category, Entry, Measure, Project, Version  # noqa: E402
+
+MEASURE_TYPES = [
+    "code_matching",
+    "code_total",
+    "code_decompiled",
+    "asm",
+    "nonmatching_functions_count",
+    "assets_identified",
+    "assets_total",
+    "assets_debinarised",
+]
+
+
+@contextmanager
+def test_database() -> Iterator[None]:
+    # Query logging would dominate the timings
+    settings.DEBUG = False
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def create_category(project_slug: str = "bench") -> Category:
+    project = Project.objects.create(slug=project_slug, name=project_slug)
+    version = Version.objects.create(slug="us", name="US", project=project)
+    return Category.objects.create(slug="default", name="Default", version=version)
+
+
+def create_history(category: Category, num_entries: int) -> None:
+    """
+    Fills a category with num_entries entries, each with every measure in MEASURE_TYPES.
+    """
+    entries = Entry.objects.bulk_create(
+        Entry(category=category, timestamp=i, git_hash=f"{i:040x}")
+        for i in range(num_entries)
+    )
+    Measure.objects.bulk_create(
+        (
+            Measure(entry=entry, type=type, value=i)
+            for entry in entries
+            for i, type in enumerate(MEASURE_TYPES)
+        ),
+        batch_size=5000,
+    )
+
+
+def best_of(func: Callable[[], Any], repeat: int = 5) -> float:
+    """
+    Returns the fastest of several runs of func, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(name: str, seconds: float, baseline: float) -> None:
+    print(f"{name:<40} {seconds * 1000:>10.1f} ms {baseline / seconds:>8.1f}x")
@@ -6,5 +6,11 @@ until nc -z ${POSTGRES_HOST} ${POSTGRES_PORT} > /dev/null; do
 done
 
 poetry run python manage.py migrate
+poetry run python manage.py createcachetable
+
+# Optionally fill the caches before serving, spending at most WARM_CACHE_TIMEOUT seconds on it
+if [ -n "${WARM_CACHE_TIMEOUT}" ]; then
+    poetry run python manage.py warm_cache --timeout "${WARM_CACHE_TIMEOUT}" || echo "Warming the cache failed, starting anyway"
+fi
 
 poetry run gunicorn frogress.wsgi -b 0.0.0.0:8000
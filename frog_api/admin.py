@@ -1,7 +1,15 @@
 from django.contrib import admin
 import nested_admin
 
-from frog_api.models import Category, Entry, Measure, Project, Version
+from frog_api.models import (
+    Category,
+    Entry,
+    IngestJob,
+    LatestEntry,
+    Measure,
+    Project,
+    Version,
+)
 
 
 class CategoryInline(nested_admin.NestedStackedInline):
@@ -24,3 +32,15 @@ class ProjectAdmin(nested_admin.NestedModelAdmin):
 admin.site.register(Project, ProjectAdmin)
 admin.site.register(Entry)
 admin.site.register(Measure)
+admin.site.register(LatestEntry)
+
+
+class IngestJobAdmin(admin.ModelAdmin):  # type:ignore
+    model = IngestJob
+    list_display = ["id", "version", "status", "entries_done", "entries_total"]
+    list_filter = ["status"]
+    # The payload can be huge
+    exclude = ["payload"]
+
+
+admin.site.register(IngestJob, IngestJobAdmin)
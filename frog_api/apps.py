@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FrogApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "frog_api"
+
+    def ready(self) -> None:
+        from frog_api import signals  # noqa: F401
@@ -1,45 +1,391 @@
-from typing import Any, Optional
-from django.core.cache import cache
-from rest_framework.utils.serializer_helpers import ReturnDict
+import hashlib
+import heapq
+import time
+from contextvars import ContextVar
+from typing import Any, Collection, Optional
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+
+from frog_api.stats import estimate_size, record, record_lookup, record_set
 
 ENTRIES_CACHE_TIMEOUT = 7200  # 2 hours
 
+# How long a history can still be served after it expired or was invalidated, while it's rebuilt
+STALE_ENTRIES_TIMEOUT = 60
+
+# How long a worker may take to rebuild a history before another one can try
+REBUILD_LOCK_TIMEOUT = 60
+
+# Whether stale data was served in the current context, which makes the response unfit for caching
+_served_stale: ContextVar[bool] = ContextVar("served_stale", default=False)
+
+STRUCTURE_GENERATION_KEY = "structure_generation"
+
+# How long each worker uses the structure generation it last read before reading it again
+STRUCTURE_GENERATION_TTL = 2
+
+# How long a structure generation lasts when the cache is private to each worker
+LOCAL_STRUCTURE_GENERATION_TIMEOUT = 10
+
+# The structure generation this worker last read, and when
+_structure_generation: tuple[Optional[int], float] = (None, 0.0)
+
+
+def _namespace(key: str, timeout: Optional[int]) -> int:
+    # A fresh value never matches anything cached under a previous namespace
+    namespace = cache.get(key)
+    if namespace is None:
+        namespace = time.time_ns()
+        if not cache.add(key, namespace, timeout):
+            namespace = cache.get(key, namespace)
+    return namespace
+
+
+# Everything cached about a category is keyed by its id, which is never reused, and its generation,
+# which uploads increment. Data read at an older generation is only ever written under an obsolete key.
+# Values keyed by free text from the client, such as downsampled series and shields, are cached one per
+# key rather than in a collection per category that could grow without bound. There is no listing those
+# keys, so values of older generations aren't dropped: they are never looked up again and expire.
+
+
+def _entries_cache_key(
+    category_id: int,
+    generation: int,
+    measure_types: Optional[Collection[str]] = None,
+) -> str:
+    key = f"entries_{category_id}_{generation}"
+    if measure_types is None:
+        return key
+
+    projection = hashlib.md5(",".join(sorted(set(measure_types))).encode()).hexdigest()
+    return f"{key}_{projection}"
 
-def _entries_cache_key(project_slug: str, version_slug: str, category_slug: str) -> str:
-    return f"entries_{project_slug}_{version_slug}_{category_slug}"
+
+def _downsample_cache_key(
+    category_id: int, generation: int, measure: str, points: int
+) -> str:
+    digest = hashlib.md5(measure.encode()).hexdigest()
+    return f"downsample_{category_id}_{generation}_{digest}_{points}"
+
+
+def _latest_cache_key(category_id: int, generation: int) -> str:
+    return f"latest_{category_id}_{generation}"
+
+
+def _shield_cache_key(
+    category_id: int, generation: int, params: tuple[Optional[str], ...]
+) -> str:
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f"shield_{category_id}_{generation}_{digest}"
+
+
+def _digest_cache_key(token: tuple[Any, ...], project_slug: Optional[str]) -> str:
+    stamp = hashlib.md5(repr(token).encode()).hexdigest()
+    if project_slug is None:
+        return f"digest_{stamp}"
+    return f"digest_{project_slug}_{stamp}"
+
+
+def _response_cache_key(etag: str) -> str:
+    return f"response_{etag}"
 
 
 def get_entries_cache(
-    project_slug: str, version_slug: str, category_slug: str
-) -> Optional[ReturnDict[str, Any]]:
+    category_id: int,
+    generation: int,
+    measure_types: Optional[Collection[str]] = None,
+    stale: bool = False,
+) -> Optional[list[dict[str, Any]]]:
+    """
+    Fetches cached entries data, optionally projected to some measure types.
+    If `stale` is set, expired data or data from the previous generation is returned as a last resort.
+    """
+    keys = [_entries_cache_key(category_id, generation, measure_types)]
+    if stale:
+        keys.append(_entries_cache_key(category_id, generation - 1, measure_types))
+
+    cached = cache.get_many(keys)
+    for i, key in enumerate(keys):
+        if key not in cached:
+            continue
+
+        data, fresh_until = cached[key]
+        if i == 0 and fresh_until >= time.time():
+            record_lookup("entries", data)
+            return data
+        if stale:
+            _served_stale.set(True)
+            return data
+
+    # Falling back to stale data follows a lookup that was already counted
+    if not stale:
+        record_lookup("entries", None)
+    return None
+
+
+def reset_served_stale() -> None:
+    _served_stale.set(False)
+
+
+def served_stale() -> bool:
     """
-    Fetches cached entries data.
+    Returns whether stale entries data was served since the last call to reset_served_stale.
     """
-    return cache.get(_entries_cache_key(project_slug, version_slug, category_slug))
+    return _served_stale.get()
 
 
 def set_entries_cache(
-    project_slug: str, version_slug: str, category_slug: str, data: ReturnDict[str, Any]
+    category_id: int,
+    generation: int,
+    data: list[dict[str, Any]],
+    measure_types: Optional[Collection[str]] = None,
+) -> None:
+    """
+    Updates cached entries data, optionally projected to some measure types.
+    `generation` is the category's generation, read before the entries were.
+    """
+    # Kept past its expiry, so it can be served while it's rebuilt
+    fresh_until = time.time() + ENTRIES_CACHE_TIMEOUT
+    record_set("entries", estimate_size(data))
+    cache.set(
+        _entries_cache_key(category_id, generation, measure_types),
+        (data, fresh_until),
+        ENTRIES_CACHE_TIMEOUT + STALE_ENTRIES_TIMEOUT,
+    )
+
+
+def _rebuild_lock_key(
+    category_id: int, generation: int, measure_types: Optional[Collection[str]]
+) -> str:
+    return f"{_entries_cache_key(category_id, generation, measure_types)}_lock"
+
+
+def lock_entries_rebuild(
+    category_id: int,
+    generation: int,
+    measure_types: Optional[Collection[str]] = None,
+) -> bool:
+    """
+    Claims the rebuild of cached entries data, so that only one worker at a time rebuilds it.
+    Returns whether the claim succeeded.
+    """
+    key = _rebuild_lock_key(category_id, generation, measure_types)
+    return cache.add(key, True, REBUILD_LOCK_TIMEOUT)
+
+
+def unlock_entries_rebuild(
+    category_id: int,
+    generation: int,
+    measure_types: Optional[Collection[str]] = None,
+) -> None:
+    """
+    Releases a claim made with lock_entries_rebuild.
+    """
+    cache.delete(_rebuild_lock_key(category_id, generation, measure_types))
+
+
+def get_downsample_cache(
+    category_id: int, generation: int, measure: str, points: int
+) -> Optional[list[dict[str, Any]]]:
+    """
+    Fetches cached downsampled entries data.
+    """
+    data = cache.get(_downsample_cache_key(category_id, generation, measure, points))
+    record_lookup("downsample", data)
+    return data
+
+
+def set_downsample_cache(
+    category_id: int,
+    generation: int,
+    measure: str,
+    points: int,
+    data: list[dict[str, Any]],
 ) -> None:
     """
-    Updates cached entries data.
+    Updates cached downsampled entries data.
     """
+    record_set("downsample", estimate_size(data))
     cache.set(
-        _entries_cache_key(project_slug, version_slug, category_slug),
+        _downsample_cache_key(category_id, generation, measure, points),
         data,
         ENTRIES_CACHE_TIMEOUT,
     )
 
 
-def invalidate_entries_cache(
-    project_slug: str, version_slug: str, data: ReturnDict[str, Any]
+def get_latest_cache(category_id: int, generation: int) -> Optional[dict[str, Any]]:
+    """
+    Fetches the cached latest entry of a category.
+    """
+    data = cache.get(_latest_cache_key(category_id, generation))
+    record_lookup("latest", data)
+    return data
+
+
+def set_latest_cache(category_id: int, generation: int, data: dict[str, Any]) -> None:
+    """
+    Updates the cached latest entry of a category.
+    """
+    record_set("latest", estimate_size(data))
+    cache.set(_latest_cache_key(category_id, generation), data, ENTRIES_CACHE_TIMEOUT)
+
+
+def get_shield_cache(
+    category_id: int, generation: int, params: tuple[Optional[str], ...]
+) -> Optional[dict[str, Any]]:
+    """
+    Fetches a cached shield payload.
+    """
+    data = cache.get(_shield_cache_key(category_id, generation, params))
+    record_lookup("shield", data)
+    return data
+
+
+def set_shield_cache(
+    category_id: int,
+    generation: int,
+    params: tuple[Optional[str], ...],
+    data: dict[str, Any],
+) -> None:
+    """
+    Updates a cached shield payload.
+    """
+    record_set("shield", estimate_size(data))
+    cache.set(
+        _shield_cache_key(category_id, generation, params), data, ENTRIES_CACHE_TIMEOUT
+    )
+
+
+def get_digest_cache(
+    token: tuple[Any, ...], project_slug: Optional[str] = None
+) -> Optional[dict[str, Any]]:
+    """
+    Fetches the cached digest of a project, or of all projects if no project is given.
+    `token` is the change token of the project, or of all projects, read before the digest was built.
+    """
+    data = cache.get(_digest_cache_key(token, project_slug))
+    record_lookup("digest", data)
+    return data
+
+
+def set_digest_cache(
+    token: tuple[Any, ...], data: dict[str, Any], project_slug: Optional[str] = None
+) -> None:
+    """
+    Updates the cached digest of a project, or of all projects if no project is given.
+    Any change to the projects, versions or categories behind it changes the token, so a digest built
+    from older data is only ever written under an obsolete key.
+    """
+    record_set("digest", estimate_size(data))
+    cache.set(_digest_cache_key(token, project_slug), data, ENTRIES_CACHE_TIMEOUT)
+
+
+def _merge_entries(
+    history: list[dict[str, Any]], entries: list[dict[str, Any]]
+) -> Optional[list[dict[str, Any]]]:
+    """
+    Merges new entries into a history, both newest first.
+    Returns None if the result might not match what reading the history from the database would give.
+    """
+    # The history may have been read after the new entries were committed, and entries are unique by
+    # timestamp and git hash within a category
+    present = {(entry["timestamp"], entry["git_hash"]) for entry in history}
+    entries = [
+        entry
+        for entry in entries
+        if (entry["timestamp"], entry["git_hash"]) not in present
+    ]
+
+    # Entries at the same time are ordered by id, which concurrent uploads may not have allocated in the
+    # order they committed
+    timestamps = {entry["timestamp"] for entry in history}
+    if any(entry["timestamp"] in timestamps for entry in entries):
+        return None
+
+    return list(heapq.merge(entries, history, key=lambda entry: -entry["timestamp"]))
+
+
+def update_entries_cache(
+    created: dict[int, tuple[int, list[dict[str, Any]]]],
+    replaced: Collection[int] = (),
+) -> None:
+    """
+    Brings the caches of categories up to date with committed new entries.
+    `created` maps category ids to the generation the entries were created in, and the entries, newest first.
+    Cached full histories of the previous generation are merged with the new entries where that is safe.
+    Histories of the categories in `replaced`, where existing entries were overwritten, are rebuilt instead.
+    """
+    obsolete = []
+    for category_id, (generation, entries) in created.items():
+        previous = _entries_cache_key(category_id, generation - 1)
+        cached = cache.get(previous)
+        merged = None
+        if cached is not None and category_id not in replaced:
+            merged = _merge_entries(cached[0], entries)
+        if merged is not None:
+            set_entries_cache(category_id, generation, merged)
+        elif cached is not None:
+            record("entries", "invalidations")
+
+        # The previous history is only kept to be served while the new one is rebuilt
+        cache.touch(previous, STALE_ENTRIES_TIMEOUT)
+        obsolete.append(_latest_cache_key(category_id, generation - 1))
+
+    for family in ("downsample", "latest", "shield"):
+        record(family, "invalidations", len(created))
+    cache.delete_many(obsolete)
+
+
+def get_response_cache(etag: str) -> Optional[tuple[dict[str, bytes], dict[str, str]]]:
+    """
+    Fetches the rendered bodies, by content coding, and the headers of a response, by its ETag.
+    """
+    cached = cache.get(_response_cache_key(etag))
+    record_lookup("response", cached)
+    return cached
+
+
+def set_response_cache(
+    etag: str, bodies: dict[str, bytes], headers: dict[str, str]
 ) -> None:
     """
-    Invalidates all affected entries caches.
+    Stores the rendered bodies, by content coding, and the headers of a response, by its ETag.
+    ETags change along with the data behind a response, so these never need to be invalidated.
+    """
+    # The bodies are already rendered, so their size is known
+    record_set("response", sum(len(body) for body in bodies.values()))
+    cache.set(_response_cache_key(etag), (bodies, headers), ENTRIES_CACHE_TIMEOUT)
+
+
+def _cache_is_shared() -> bool:
+    backend: str = settings.CACHES[DEFAULT_CACHE_ALIAS]["BACKEND"]
+    return not backend.endswith("LocMemCache")
+
+
+def get_structure_generation() -> int:
+    """
+    Returns a stamp that changes whenever a project, version or category is created, changed or deleted.
+    Each worker holds on to the stamp for STRUCTURE_GENERATION_TTL seconds rather than looking it up
+    every time. If the cache isn't shared between workers, changes made through one worker can't reach
+    the others, so the stamp is renewed every LOCAL_STRUCTURE_GENERATION_TIMEOUT seconds instead.
     """
-    all_categories = set()
-    for entry in data["entries"]:
-        for category in entry["categories"]:
-            all_categories.add(category)
-    for category_slug in all_categories:
-        cache.delete(_entries_cache_key(project_slug, version_slug, category_slug))
+    global _structure_generation
+
+    generation, read_at = _structure_generation
+    if generation is not None and time.monotonic() - read_at < STRUCTURE_GENERATION_TTL:
+        return generation
+
+    timeout = None if _cache_is_shared() else LOCAL_STRUCTURE_GENERATION_TIMEOUT
+    generation = _namespace(STRUCTURE_GENERATION_KEY, timeout)
+    _structure_generation = (generation, time.monotonic())
+    return generation
+
+
+def bump_structure_generation() -> None:
+    """
+    Invalidates everything derived from the structure of projects, versions and categories.
+    """
+    global _structure_generation
+
+    cache.delete(STRUCTURE_GENERATION_KEY)
+    _structure_generation = (None, 0.0)
@@ -0,0 +1,74 @@
+import gzip
+from typing import Collection, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content codings of a response body, each mapped to the body encoded with it
+BodiesT = dict[str, bytes]
+
+# Bodies shorter than this aren't worth compressing, as in django.middleware.gzip
+MIN_COMPRESSED_LENGTH = 200
+
+# Bodies are compressed on the request thread of the response that misses the cache. The highest
+# levels take several times as long for a few percent smaller output, so stick to moderate ones.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Codings we'd rather send, best first, when a client accepts several equally
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+
+
+def compress_body(content: bytes) -> BodiesT:
+    """
+    Returns a body along with its compressed versions, if it's long enough to compress.
+    Brotli is only used if the optional brotli package is installed.
+    """
+    bodies = {"identity": content}
+    if len(content) < MIN_COMPRESSED_LENGTH:
+        return bodies
+
+    # A fixed mtime keeps the output the same for the same content
+    bodies["gzip"] = gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+    if brotli is not None:
+        bodies["br"] = brotli.compress(content, quality=BROTLI_QUALITY)
+    return bodies
+
+
+def _parse_quality(params: str) -> Optional[float]:
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return 1.0
+
+
+def choose_encoding(accept_encoding: str, available: Collection[str]) -> str:
+    """
+    Picks the coding to send a body with, out of the available ones, following an Accept-Encoding header.
+    Falls back to identity when the client accepts none of the others.
+    """
+    qualities: dict[str, float] = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        q = _parse_quality(params)
+        if name.strip() and q is not None:
+            qualities[name.strip().lower()] = q
+
+    def quality(coding: str) -> float:
+        # Identity is acceptable unless explicitly refused
+        default = qualities.get("*", 1.0 if coding == "identity" else 0.0)
+        return qualities.get(coding, default)
+
+    candidates = [
+        coding
+        for coding in ENCODING_PREFERENCE
+        if coding in available and quality(coding) > 0
+    ]
+    # max() keeps the first of equally good codings, so ties go to our preference
+    return max(candidates, key=quality, default="identity")
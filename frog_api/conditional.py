@@ -0,0 +1,232 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from django.db.models import Count, Max, Sum
+from django.http import HttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from frog_api.cache import (
+    get_response_cache,
+    reset_served_stale,
+    served_stale,
+    set_response_cache,
+)
+from frog_api.compression import BodiesT, choose_encoding, compress_body
+from frog_api.models import Category, Project, Version
+from frog_api.stats import timed_rebuild
+
+# Values that change whenever the data behind a response does, and when it last changed
+ChangeTokenT = tuple[tuple[Any, ...], Optional[datetime]]
+
+ViewMethodT = Callable[..., HttpResponseBase]
+
+
+def _latest(*times: Optional[datetime]) -> Optional[datetime]:
+    return max((t for t in times if t is not None), default=None)
+
+
+def root_change_token() -> ChangeTokenT:
+    projects = Project.objects.aggregate(count=Count("id"), updated=Max("last_updated"))
+    versions = Version.objects.aggregate(count=Count("id"), updated=Max("last_updated"))
+    categories = Category.objects.aggregate(
+        count=Count("id"), updated=Max("last_updated"), generation=Sum("generation")
+    )
+
+    parts = (
+        projects["count"],
+        versions["count"],
+        categories["count"],
+        categories["generation"],
+    )
+    updated = _latest(projects["updated"], versions["updated"], categories["updated"])
+    return parts + (updated,), updated
+
+
+def project_change_token(project_slug: str) -> Optional[ChangeTokenT]:
+    project = (
+        Project.objects.filter(slug=project_slug)
+        .annotate(
+            versions_count=Count("versions", distinct=True),
+            versions_updated=Max("versions__last_updated"),
+        )
+        .first()
+    )
+    if project is None:
+        return None
+
+    categories = Category.objects.filter(version__project=project).aggregate(
+        count=Count("id"), updated=Max("last_updated"), generation=Sum("generation")
+    )
+
+    parts = (
+        project.id,
+        project.versions_count,
+        categories["count"],
+        categories["generation"],
+    )
+    updated = _latest(
+        project.last_updated, project.versions_updated, categories["updated"]
+    )
+    return parts + (updated,), updated
+
+
+def version_change_token(
+    project_slug: str, version_slug: str
+) -> Optional[ChangeTokenT]:
+    version = (
+        Version.objects.filter(slug=version_slug, project__slug=project_slug)
+        .annotate(
+            categories_count=Count("category"),
+            categories_updated=Max("category__last_updated"),
+            categories_generation=Sum("category__generation"),
+        )
+        .first()
+    )
+    if version is None:
+        return None
+
+    parts = (version.id, version.categories_count, version.categories_generation)
+    updated = _latest(version.last_updated, version.categories_updated)
+    return parts + (updated,), updated
+
+
+def category_change_token(
+    project_slug: str, version_slug: str, category_slug: str
+) -> Optional[ChangeTokenT]:
+    category = (
+        Category.objects.filter(
+            slug=category_slug,
+            version__slug=version_slug,
+            version__project__slug=project_slug,
+        )
+        .values_list("id", "generation", "last_updated", "version__last_updated")
+        .first()
+    )
+    if category is None:
+        return None
+
+    id, generation, category_updated, version_updated = category
+    updated = _latest(category_updated, version_updated)
+    return (id, generation, updated), updated
+
+
+def _etag(request: Request, parts: tuple[Any, ...]) -> str:
+    # Responses also depend on the query parameters and the negotiated format
+    hasher = hashlib.sha256()
+    for part in (request.get_full_path(), request.META.get("HTTP_ACCEPT"), *parts):
+        hasher.update(repr(part).encode())
+        hasher.update(b"\0")
+    return quote_etag(hasher.hexdigest()[:32])
+
+
+def _render(
+    view: APIView, request: Request, response: HttpResponseBase
+) -> Optional[Response]:
+    """
+    Renders a successful JSON response ahead of time, so its content can be cached.
+    Returns the rendered response, or None if the response can't be cached.
+    """
+    if not isinstance(response, Response) or response.status_code != 200:
+        return None
+    # Leave the browsable API alone
+    if not isinstance(request.accepted_renderer, JSONRenderer):
+        return None
+
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()  # type: ignore[attr-defined]
+    response.render()
+    return response
+
+
+def _encode(
+    request: Request, response: HttpResponse, etag: str, bodies: BodiesT
+) -> None:
+    """
+    Gives a response the cached body in the best content coding the client accepts.
+    """
+    encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), bodies)
+
+    response.content = bodies[encoding]
+    patch_vary_headers(response, ("Accept-Encoding",))
+
+    if encoding != "identity":
+        response["Content-Encoding"] = encoding
+        # The body differs from the identity one, so the ETag is weakened like
+        # django.middleware.gzip does
+        response["ETag"] = f"W/{etag}"
+
+
+def conditional(
+    change_token: Callable[..., Optional[ChangeTokenT]]
+) -> Callable[[ViewMethodT], ViewMethodT]:
+    """
+    Answers conditional GET requests with 304 Not Modified, based on a change token computed from
+    the view's URL arguments, before the view itself runs.
+    Like django.views.decorators.http.condition, but the token is only computed once.
+    Rendered JSON responses are cached by their ETag, along with their compressed versions, and served
+    as they are until the token changes.
+    """
+
+    def decorator(func: ViewMethodT) -> ViewMethodT:
+        @wraps(func)
+        def inner(
+            self: APIView, request: Request, *args: Any, **kwargs: Any
+        ) -> HttpResponseBase:
+            token = change_token(*args, **kwargs)
+            if token is None:
+                return func(self, request, *args, **kwargs)
+
+            parts, updated = token
+            etag = _etag(request, parts)
+            last_modified = int(updated.timestamp()) if updated is not None else None
+
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                return not_modified
+
+            response: HttpResponseBase
+            cached = get_response_cache(etag)
+            if cached is not None:
+                bodies, headers = cached
+                response = HttpResponse()
+                for header, value in headers.items():
+                    response[header] = value
+                _encode(request, response, etag, bodies)
+            else:
+                reset_served_stale()
+                with timed_rebuild("response"):
+                    response = func(self, request, *args, **kwargs)
+                    if served_stale():
+                        # Neither we nor clients should remember it under the up to date ETag
+                        return response
+
+                    rendered = _render(self, request, response)
+                    if rendered is not None:
+                        compressed = compress_body(rendered.content)
+                        set_response_cache(etag, compressed, dict(rendered.items()))
+                        _encode(request, rendered, etag, compressed)
+
+            if response.status_code == 200:
+                if not response.has_header("ETag"):
+                    response["ETag"] = etag
+                if last_modified is not None and not response.has_header(
+                    "Last-Modified"
+                ):
+                    response["Last-Modified"] = http_date(last_modified)
+
+            return response
+
+        return inner
+
+    return decorator
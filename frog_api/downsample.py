@@ -0,0 +1,66 @@
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
+
+# Rows are (x, y, ...) tuples; any extra fields are carried along untouched
+RowT = tuple[Any, ...]
+
+
+def _largest_triangle(a: RowT, bucket: list[RowT], cx: float, cy: float) -> RowT:
+    """
+    Returns the row of a bucket that forms the largest triangle with a and (cx, cy).
+    """
+    ax, ay = a[0], a[1]
+    return max(
+        bucket,
+        key=lambda b: abs((ax - cx) * (b[1] - ay) - (ax - b[0]) * (cy - ay)),
+    )
+
+
+def largest_triangle_three_buckets(
+    rows: Iterable[RowT], count: int, threshold: int
+) -> list[RowT]:
+    """
+    Downsamples `count` rows sorted by x to at most `threshold` rows, keeping the visual shape of the series.
+    The rows are consumed as a stream and at most two buckets are held in memory at a time.
+    """
+    it = iter(rows)
+    if count <= threshold or threshold < 3:
+        return list(it)
+
+    first = next(it, None)
+    if first is None:
+        return []
+    sampled = [first]
+
+    def buckets() -> Iterator[list[RowT]]:
+        # The first and last rows are kept as is, the rest are split into threshold - 2 buckets
+        start = 1
+        for i in range(1, threshold - 1):
+            end = i * (count - 2) // (threshold - 2) + 1
+            bucket = list(islice(it, end - start))
+            start = end
+            if bucket:
+                yield bucket
+
+    bucket_iter = buckets()
+    current: list[RowT] = next(bucket_iter, [])
+    for following in bucket_iter:
+        cx = sum(row[0] for row in following) / len(following)
+        cy = sum(row[1] for row in following) / len(following)
+        sampled.append(_largest_triangle(sampled[-1], current, cx, cy))
+        current = following
+
+    # Anything past the counted rows was added since counting; only the newest row is kept
+    last: Optional[RowT] = None
+    for last in it:
+        pass
+
+    if current:
+        if last is None:
+            last = current.pop()
+        if current:
+            sampled.append(_largest_triangle(sampled[-1], current, last[0], last[1]))
+    if last is not None:
+        sampled.append(last)
+
+    return sampled
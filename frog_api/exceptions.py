@@ -26,6 +26,13 @@ class NonexistentCategoryException(APIException):
         )
 
 
+class NonexistentIngestJobException(APIException):
+    status_code = status.HTTP_404_NOT_FOUND
+
+    def __init__(self, job_id: int):
+        super().__init__(f"Ingest job {job_id} does not exist")
+
+
 class EmptyCategoryException(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
 
@@ -49,6 +56,24 @@ class InvalidDataException(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
 
 
+class LengthRequiredException(APIException):
+    status_code = status.HTTP_411_LENGTH_REQUIRED
+    default_detail = "NDJSON uploads must have a Content-Length, not be sent chunked"
+
+
+class PartialUploadException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, error: APIException, entries_done: int, chunks_done: int):
+        super().__init__(error.detail)
+        # Set directly, as APIException would turn the counts into strings
+        self.detail = {
+            "detail": self.detail,
+            "entries_done": entries_done,  # type: ignore[dict-item]
+            "chunks_done": chunks_done,  # type: ignore[dict-item]
+        }
+
+
 # Maybe?
 class AlreadyExistsException(APIException):
     status_code = status.HTTP_400_BAD_REQUEST
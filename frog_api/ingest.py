@@ -0,0 +1,280 @@
+import json
+from enum import Enum
+from typing import Any, Callable, Optional, Sequence
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from frog_api.cache import update_entries_cache
+from frog_api.exceptions import (
+    InvalidDataException,
+    NonexistentProjectException,
+    NonexistentVersionException,
+)
+from frog_api.latest import update_latest_entries
+from frog_api.models import Category, Entry, Measure, Version
+from frog_api.readers import EntryT
+from frog_api.serializers.request_serializers import CreateEntrySerializer
+from frog_api.views.common import (
+    get_categories,
+    get_project,
+    get_version,
+    validate_api_key,
+)
+
+# Entries are unique by these, per the "unique entry" constraint
+ENTRY_UNIQUE_FIELDS = ["timestamp", "git_hash", "category"]
+
+EntryKeyT = tuple[int, int, str]
+
+
+class OnConflict(Enum):
+    """
+    What to do with uploaded entries that already exist
+    """
+
+    ERROR = "error"
+    SKIP = "skip"
+    UPDATE = "update"
+
+
+def _key(entry: Entry) -> EntryKeyT:
+    return (entry.category_id, entry.timestamp, entry.git_hash)
+
+
+def _entry_ids(entries: list[Entry]) -> dict[EntryKeyT, int]:
+    # The ids of whichever of the given entries are in the database
+    if not entries:
+        return {}
+
+    keys = {_key(entry) for entry in entries}
+    rows = Entry.objects.filter(
+        category_id__in={entry.category_id for entry in entries},
+        timestamp__gte=min(entry.timestamp for entry in entries),
+        timestamp__lte=max(entry.timestamp for entry in entries),
+    ).values_list("category_id", "timestamp", "git_hash", "id")
+
+    return {
+        (category_id, timestamp, git_hash): id
+        for category_id, timestamp, git_hash, id in rows.iterator()
+        if (category_id, timestamp, git_hash) in keys
+    }
+
+
+def _resolve_entry_ids(entries: list[Entry]) -> None:
+    ids = _entry_ids(entries)
+    for entry in entries:
+        entry.id = ids[_key(entry)]
+
+
+def bulk_create_entries(
+    entries: list[Entry],
+    measures: list[Measure],
+    on_conflict: OnConflict = OnConflict.ERROR,
+) -> list[Entry]:
+    """
+    Inserts new entries, then their measures, INGEST_BATCH_SIZE rows per query.
+    Entries are given their ids. Returns the entries that already existed, which are skipped or have
+    their measures replaced, depending on `on_conflict`.
+    Must be called within a transaction that locks the entries' categories.
+    """
+    if not entries:
+        return []
+
+    batch_size = settings.INGEST_BATCH_SIZE
+
+    existing_ids = {} if on_conflict == OnConflict.ERROR else _entry_ids(entries)
+    existing = [entry for entry in entries if _key(entry) in existing_ids]
+
+    if on_conflict == OnConflict.SKIP:
+        entries = [entry for entry in entries if _key(entry) not in existing_ids]
+        measures = [m for m in measures if _key(m.entry) not in existing_ids]
+        Entry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+    elif on_conflict == OnConflict.UPDATE:
+        Entry.objects.bulk_create(
+            entries,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=ENTRY_UNIQUE_FIELDS,
+            update_fields=["last_updated"],
+        )
+        # Deleted without signals, which would mark the categories as changed once per measure. The
+        # upload does that itself
+        measures_query = Measure.objects.filter(entry_id__in=existing_ids.values())
+        measures_query._raw_delete(measures_query.db)
+    else:
+        # The unique constraint rejects existing entries
+        Entry.objects.bulk_create(entries, batch_size=batch_size)
+
+    # Rows inserted while ignoring conflicts don't get their ids back
+    if (
+        on_conflict == OnConflict.SKIP
+        or not connection.features.can_return_rows_from_bulk_insert
+    ):
+        _resolve_entry_ids(entries)
+    for entry in existing:
+        entry.id = existing_ids[_key(entry)]
+
+    # Measures pick up the ids of their entries as they're inserted
+    Measure.objects.bulk_create(measures, batch_size=batch_size)
+    return existing
+
+
+def created_entries_by_category(
+    created: list[tuple[Entry, dict[str, int]]], generations: dict[int, int]
+) -> dict[int, tuple[int, list[EntryT]]]:
+    """
+    Groups newly created entries by category id, newest first, along with the generation of
+    their category.
+    """
+    ret: dict[int, tuple[int, list[EntryT]]] = {}
+    for entry, measures in sorted(
+        created, key=lambda created: (-created[0].timestamp, -created[0].id)
+    ):
+        if entry.category_id not in ret:
+            ret[entry.category_id] = (generations[entry.category_id], [])
+        ret[entry.category_id][1].append(
+            {
+                "timestamp": entry.timestamp,
+                "git_hash": entry.git_hash,
+                "measures": measures,
+                "description": entry.description,
+            }
+        )
+    return ret
+
+
+def get_upload_version(project_slug: str, version_slug: str, api_key: str) -> Version:
+    try:
+        project = get_project(project_slug)
+    except NonexistentProjectException:
+        raise InvalidDataException(f"Project '{project_slug}' does not exist")
+
+    validate_api_key(api_key, project)
+
+    try:
+        return get_version(version_slug, project)
+    except NonexistentVersionException:
+        raise InvalidDataException(f"Version '{version_slug}' does not exist")
+
+
+def validate_uploaded_entries(
+    chunk: list[Any], numbers: Sequence[int]
+) -> list[dict[str, Any]]:
+    """
+    Validates a chunk of uploaded entries. Errors are reported by the given numbers of the entries.
+    """
+    entries_ser = CreateEntrySerializer(data=chunk, many=True)
+    if entries_ser.is_valid():
+        return entries_ser.validated_data
+
+    # A list of every entry's errors, or a dict of the invalid ones' in newer versions of DRF
+    errors: Any = entries_ser.errors
+    if isinstance(errors, list):
+        errors = dict(enumerate(errors))
+    invalid = {numbers[i]: error for i, error in errors.items() if error}
+    raise InvalidDataException(f"Invalid entries: {json.dumps(invalid)}")
+
+
+def write_entries(
+    version: Version,
+    entries_data: list[dict[str, Any]],
+    on_conflict: OnConflict = OnConflict.ERROR,
+    before_commit: Optional[Callable[[dict[str, int]], None]] = None,
+) -> dict[str, int]:
+    """
+    Writes validated uploaded entries to the categories of a version in a single transaction.
+    Returns how many rows were written, and how many entries were inserted, skipped and updated.
+    `before_commit` is called with those counts within the transaction.
+    """
+    slugs = {cat for uploaded in entries_data for cat in uploaded["categories"]}
+    found = get_categories(slugs, version)
+    missing = sorted(slugs - found.keys())
+    if len(missing) == 1:
+        raise InvalidDataException(f"Category '{missing[0]}' does not exist")
+    if missing:
+        names = ", ".join(f"'{cat}'" for cat in missing)
+        raise InvalidDataException(f"Categories {names} do not exist")
+
+    entries: list[Entry] = []
+    measures: list[Measure] = []
+    created: list[tuple[Entry, dict[str, int]]] = []
+    seen: set[tuple[str, int, str]] = set()
+    for uploaded in entries_data:
+        timestamp = uploaded["timestamp"]
+        git_hash = uploaded["git_hash"]
+        categories = uploaded["categories"]
+        for cat in categories:
+            if (cat, timestamp, git_hash) in seen:
+                raise InvalidDataException(
+                    f"Duplicate entry for {cat} at {timestamp} ({git_hash})"
+                )
+            seen.add((cat, timestamp, git_hash))
+
+            entry = Entry(category=found[cat], timestamp=timestamp, git_hash=git_hash)
+
+            entries.append(entry)
+            created.append((entry, categories[cat]))
+
+            for measure_type in categories[cat]:
+                value = categories[cat][measure_type]
+                if type(value) != int:
+                    raise InvalidDataException(
+                        f"{cat}:{measure_type} must be an integer, not {type(value): {value}}"
+                    )
+                measures.append(Measure(entry=entry, type=measure_type, value=value))
+
+    try:
+        with transaction.atomic():
+            # Concurrent uploads to the same categories take turns, so each sees the entries the
+            # others wrote when looking for existing ones
+            category_ids = {entry.category_id for entry in entries}
+            list(
+                Category.objects.select_for_update()
+                .filter(id__in=category_ids)
+                .values_list("id", flat=True)
+            )
+
+            existing = bulk_create_entries(entries, measures, on_conflict)
+            existing_ids = {entry.id for entry in existing}
+            if on_conflict == OnConflict.SKIP:
+                created = [c for c in created if c[0].id not in existing_ids]
+
+            update_latest_entries(created)
+
+            written_ids = {entry.category_id for entry, _ in created}
+            Category.objects.filter(id__in=written_ids).update(
+                generation=F("generation") + 1, last_updated=timezone.now()
+            )
+
+            # The categories are locked until the transaction ends, so these are the generations
+            # the new entries belong to, even with concurrent uploads
+            generations = dict(
+                Category.objects.filter(id__in=written_ids).values_list(
+                    "id", "generation"
+                )
+            )
+
+            skipped = len(existing) if on_conflict == OnConflict.SKIP else 0
+            updated = len(existing) if on_conflict == OnConflict.UPDATE else 0
+            counts = {
+                "wrote": len(created) + sum(len(m) for _, m in created),
+                "inserted": len(entries) - len(existing),
+                "skipped": skipped,
+                "updated": updated,
+            }
+            if before_commit is not None:
+                before_commit(counts)
+    except IntegrityError as e:
+        raise InvalidDataException(f"Integrity error: {e}")
+
+    update_entries_cache(
+        created_entries_by_category(created, generations),
+        replaced={entry.category_id for entry in existing}
+        if on_conflict == OnConflict.UPDATE
+        else set(),
+    )
+
+    return counts
@@ -0,0 +1,92 @@
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from frog_api.ingest import OnConflict, validate_uploaded_entries, write_entries
+from frog_api.models import IngestJob, Version
+
+
+def claim_ingest_job() -> Optional[IngestJob]:
+    """
+    Marks the oldest queued job as running and returns it, or returns None if the queue is empty.
+    Workers skip jobs other workers are claiming, so each job is only claimed once.
+    """
+    with transaction.atomic():
+        job = (
+            IngestJob.objects.select_for_update(skip_locked=True)
+            .filter(status=IngestJob.Status.QUEUED)
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = IngestJob.Status.RUNNING
+        if job.started_on is None:
+            job.started_on = timezone.now()
+        job.save(update_fields=["status", "started_on", "last_updated"])
+        return job
+
+
+def requeue_running_jobs() -> int:
+    """
+    Puts jobs left running by a worker that stopped back in the queue. They resume after their last
+    committed chunk. Returns the number of jobs requeued.
+    """
+    return IngestJob.objects.filter(status=IngestJob.Status.RUNNING).update(
+        status=IngestJob.Status.QUEUED, last_updated=timezone.now()
+    )
+
+
+def _finish(job: IngestJob, status: str, error: str = "") -> None:
+    job.status = status
+    job.error = error
+    job.finished_on = timezone.now()
+    fields = ["status", "error", "finished_on", "last_updated"]
+    if status == IngestJob.Status.DONE:
+        # The entries are in the database now
+        job.payload = []
+        fields.append("payload")
+    job.save(update_fields=fields)
+
+
+def run_ingest_job(job: IngestJob) -> None:
+    """
+    Writes the entries of a claimed job, INGEST_CHUNK_SIZE at a time. Each chunk is validated and
+    committed on its own, along with the job's progress.
+    A chunk that fails validation fails the job, leaving the chunks before it written.
+    """
+    version = Version.objects.select_related("project").get(id=job.version_id)
+    on_conflict = OnConflict(job.on_conflict)
+    chunk_size = settings.INGEST_CHUNK_SIZE
+
+    def record_progress(chunk_len: int, counts: dict[str, int]) -> None:
+        job.entries_done += chunk_len
+        for name, count in counts.items():
+            job.result[name] = job.result.get(name, 0) + count
+        job.save(update_fields=["entries_done", "result", "last_updated"])
+
+    try:
+        while job.entries_done < job.entries_total:
+            start = job.entries_done
+            chunk = job.payload[start : start + chunk_size]
+
+            entries = validate_uploaded_entries(chunk, range(start, start + len(chunk)))
+
+            write_entries(
+                version,
+                entries,
+                on_conflict,
+                before_commit=lambda counts: record_progress(len(chunk), counts),
+            )
+    except APIException as e:
+        _finish(job, IngestJob.Status.FAILED, str(e.detail))
+        return
+    except Exception as e:
+        _finish(job, IngestJob.Status.FAILED, f"Internal error: {e!r}")
+        raise
+
+    _finish(job, IngestJob.Status.DONE)
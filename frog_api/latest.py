@@ -0,0 +1,172 @@
+from typing import Any, Iterable, Optional
+
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, QuerySet, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from frog_api.models import Category, Entry, LatestEntry, Measure
+from frog_api.readers import read_measures
+
+REBUILD_BATCH_SIZE = 500
+
+
+def latest_entries_queryset(category_ids: Iterable[int]) -> QuerySet[Entry]:
+    """
+    Returns the most recent entry of each of the given categories.
+    """
+    entries = Entry.objects.filter(category_id__in=category_ids)
+
+    if connection.features.supports_over_clause:
+        return entries.annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F("category_id"),
+                order_by=[F("timestamp").desc(), F("id").desc()],
+            )
+        ).filter(row_number=1)
+
+    newest = (
+        Entry.objects.filter(category_id=OuterRef("category_id"))
+        .order_by("-timestamp", "-id")
+        .values("id")[:1]
+    )
+    return entries.filter(id=Subquery(newest))
+
+
+def latest_entry_data(latest: LatestEntry) -> dict[str, Any]:
+    """
+    Returns a latest entry in the same shape as EntrySerializer.
+    """
+    return {
+        "timestamp": latest.timestamp,
+        "git_hash": latest.git_hash,
+        "measures": latest.measures,
+        "description": latest.description,
+    }
+
+
+def _latest_entry_from(entry: Entry, measures: dict[str, int]) -> LatestEntry:
+    return LatestEntry(
+        category_id=entry.category_id,
+        entry=entry,
+        timestamp=entry.timestamp,
+        git_hash=entry.git_hash,
+        description=entry.description,
+        measures=measures,
+    )
+
+
+def refresh_latest_entry(category_id: int) -> Optional[LatestEntry]:
+    """
+    Recomputes the latest entry of a category from its full history.
+    The category is locked while it's read and written, like uploads do, so a refresh that read an
+    older history can't overwrite the latest entry of a concurrent upload.
+    """
+    with transaction.atomic():
+        list(
+            Category.objects.select_for_update()
+            .filter(id=category_id)
+            .values_list("id", flat=True)
+        )
+
+        entry = (
+            Entry.objects.filter(category_id=category_id)
+            .order_by("-timestamp", "-id")
+            .first()
+        )
+
+        if entry is None:
+            LatestEntry.objects.filter(category_id=category_id).delete()
+            return None
+
+        measures = read_measures(Measure.objects.filter(entry=entry))
+        latest = _latest_entry_from(entry, measures.get(entry.id, {}))
+        latest.save()
+        return latest
+
+
+def get_latest_entry_data(category_id: int) -> Optional[dict[str, Any]]:
+    """
+    Fetches the latest entry of a category, recomputing it if it is missing or stale.
+    """
+    latest = LatestEntry.objects.filter(category_id=category_id).first()
+
+    if latest is None or latest.entry_id is None:
+        latest = refresh_latest_entry(category_id)
+        if latest is None:
+            return None
+
+    return latest_entry_data(latest)
+
+
+def get_latest_entries_data(
+    categories: QuerySet[Category],
+) -> dict[str, dict[str, Any]]:
+    """
+    Fetches the latest entry of each of the given categories, keyed by category slug.
+    Categories without any entries are left out.
+    """
+    ret = {}
+    for category in categories.select_related("latest_entry"):
+        latest: Optional[LatestEntry] = getattr(category, "latest_entry", None)
+
+        if latest is None or latest.entry_id is None:
+            latest = refresh_latest_entry(category.id)
+            if latest is None:
+                continue
+
+        ret[category.slug] = latest_entry_data(latest)
+    return ret
+
+
+def update_latest_entries(created: Iterable[tuple[Entry, dict[str, int]]]) -> None:
+    """
+    Brings the latest entries of the affected categories up to date with newly created entries.
+    Must be called within the transaction that created them.
+    """
+    newest: dict[int, tuple[Entry, dict[str, int]]] = {}
+    for entry, measures in created:
+        current = newest.get(entry.category_id)
+        if current is None or (entry.timestamp, entry.id) > (
+            current[0].timestamp,
+            current[0].id,
+        ):
+            newest[entry.category_id] = (entry, measures)
+
+    existing = LatestEntry.objects.in_bulk(list(newest.keys()))
+
+    for category_id, (entry, measures) in newest.items():
+        latest = existing.get(category_id)
+
+        if latest is None or latest.entry_id is None:
+            # The category may have older history that is newer than this entry
+            refresh_latest_entry(category_id)
+        elif (entry.timestamp, entry.id) >= (latest.timestamp, latest.entry_id):
+            # Also rewrites the latest entry when its measures were replaced
+            _latest_entry_from(entry, measures).save()
+
+
+def rebuild_latest_entries() -> int:
+    """
+    Recomputes the latest entry of every category from scratch.
+    Returns the number of latest entries written.
+    """
+    category_ids = list(Category.objects.values_list("id", flat=True))
+    written = 0
+
+    with transaction.atomic():
+        LatestEntry.objects.all().delete()
+
+        for i in range(0, len(category_ids), REBUILD_BATCH_SIZE):
+            batch = category_ids[i : i + REBUILD_BATCH_SIZE]
+            entries = latest_entries_queryset(batch).prefetch_related("measures")
+            latest_entries = [
+                _latest_entry_from(
+                    entry, {m.type: m.value for m in entry.measures.all()}
+                )
+                for entry in entries
+            ]
+            LatestEntry.objects.bulk_create(latest_entries)
+            written += len(latest_entries)
+
+    return written
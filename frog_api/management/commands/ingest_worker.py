@@ -0,0 +1,54 @@
+import time
+import traceback
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from frog_api.jobs import claim_ingest_job, requeue_running_jobs, run_ingest_job
+from frog_api.models import IngestJob
+
+
+class Command(BaseCommand):
+    help = "Writes uploads queued with ?async=true, oldest first"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty, instead of waiting for new jobs",
+        )
+        parser.add_argument(
+            "--requeue",
+            action="store_true",
+            help="Resume jobs left running by a worker that stopped. Only use when no other worker is running.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["requeue"]:
+            requeued = requeue_running_jobs()
+            self.stdout.write(f"Requeued {requeued} jobs")
+
+        while True:
+            job = claim_ingest_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(settings.INGEST_WORKER_POLL_INTERVAL)
+                continue
+
+            start = time.monotonic()
+            try:
+                run_ingest_job(job)
+            except Exception:
+                # The job is marked as failed; keep draining the queue
+                self.stderr.write(self.style.ERROR(f"Job {job.id} crashed"))
+                self.stderr.write(traceback.format_exc())
+                continue
+
+            elapsed = time.monotonic() - start
+            message = f"Job {job.id}: {job.entries_done} of {job.entries_total} entries written in {elapsed:.1f}s"
+            if job.status == IngestJob.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(message))
+            else:
+                self.stdout.write(self.style.WARNING(f"{message}, failed: {job.error}"))
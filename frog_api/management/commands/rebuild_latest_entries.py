@@ -0,0 +1,13 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from frog_api.latest import rebuild_latest_entries
+
+
+class Command(BaseCommand):
+    help = "Recomputes the latest entry of every category from its full history"
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        written = rebuild_latest_entries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} latest entries"))
@@ -0,0 +1,129 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Optional
+
+import django
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+
+from frog_api.models import Category, Project
+from frog_api.views.data import (
+    get_all_entries,
+    get_latest_entry,
+    get_project_digest,
+    get_root_digest,
+)
+
+CategorySlugsT = tuple[str, str, str]
+
+
+def _init_worker() -> None:
+    # Needed when workers are spawned rather than forked
+    django.setup()
+
+
+def warm_category(slugs: CategorySlugsT) -> CategorySlugsT:
+    """
+    Fills the full history and latest entry caches of a category.
+    """
+    get_all_entries(*slugs)
+    get_latest_entry(*slugs)
+    return slugs
+
+
+class Command(BaseCommand):
+    help = "Fills the entries, latest entry and digest caches of every category"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of processes to warm categories with. 1 warms them in this process.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=None,
+            help="Seconds after which categories that haven't been warmed yet are skipped, and those being warmed by workers are stopped",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        backend = settings.CACHES[DEFAULT_CACHE_ALIAS]["BACKEND"]
+        if backend.endswith("LocMemCache"):
+            self.stderr.write(
+                self.style.WARNING(
+                    "The local memory cache is private to each process, so warming it from here has no effect on the server"
+                )
+            )
+
+        start = time.monotonic()
+        deadline = start + options["timeout"] if options["timeout"] else None
+
+        categories: list[CategorySlugsT] = list(
+            Category.objects.order_by("id").values_list(
+                "version__project__slug", "version__slug", "slug"
+            )
+        )
+
+        if options["workers"] > 1:
+            warmed = self.warm_in_pool(categories, options["workers"], deadline)
+        else:
+            warmed = self.warm_in_process(categories, deadline)
+
+        digests = 0
+        if deadline is None or time.monotonic() < deadline:
+            get_root_digest()
+            for project_slug in Project.objects.values_list("slug", flat=True):
+                get_project_digest(project_slug)
+                digests += 1
+
+        elapsed = time.monotonic() - start
+        message = f"Warmed {warmed} of {len(categories)} categories and {digests} project digests in {elapsed:.1f}s"
+        if warmed < len(categories):
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    def warm_in_process(
+        self, categories: list[CategorySlugsT], deadline: Optional[float]
+    ) -> int:
+        warmed = 0
+        for slugs in categories:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            warm_category(slugs)
+            warmed += 1
+        return warmed
+
+    def warm_in_pool(
+        self, categories: list[CategorySlugsT], workers: int, deadline: Optional[float]
+    ) -> int:
+        warmed = 0
+        # Forked workers mustn't inherit open connections: closing them there would close them for this
+        # process too. This process reconnects when it next queries the database
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        pending: set[Future[CategorySlugsT]] = set()
+        try:
+            pending = {executor.submit(warm_category, slugs) for slugs in categories}
+            while pending:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+
+                done, pending = wait(pending, timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    warmed += 1
+        finally:
+            if pending:
+                # Categories still being warmed would otherwise run past the deadline, and the executor has
+                # no public way to stop them
+                for process in list(executor._processes.values()):
+                    process.terminate()
+            executor.shutdown(cancel_futures=True)
+        return warmed
@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def populate_latest_entries(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    Category = apps.get_model("frog_api", "Category")
+    Entry = apps.get_model("frog_api", "Entry")
+    LatestEntry = apps.get_model("frog_api", "LatestEntry")
+
+    for category in Category.objects.all():
+        entry = (
+            Entry.objects.filter(category=category)
+            .order_by("-timestamp", "-id")
+            .prefetch_related("measures")
+            .first()
+        )
+        if entry is None:
+            continue
+
+        LatestEntry.objects.create(
+            category=category,
+            entry=entry,
+            timestamp=entry.timestamp,
+            git_hash=entry.git_hash,
+            description=entry.description,
+            measures={m.type: m.value for m in entry.measures.order_by("id")},
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("frog_api", "0011_entry_description"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LatestEntry",
+            fields=[
+                (
+                    "category",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="latest_entry",
+                        serialize=False,
+                        to="frog_api.category",
+                    ),
+                ),
+                ("last_updated", models.DateTimeField(auto_now=True)),
+                ("timestamp", models.IntegerField()),
+                ("git_hash", models.CharField(max_length=40)),
+                ("description", models.TextField(blank=True)),
+                ("measures", models.JSONField(default=dict)),
+                (
+                    "entry",
+                    models.OneToOneField(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="frog_api.entry",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Latest entries",
+            },
+        ),
+        migrations.RunPython(populate_latest_entries, migrations.RunPython.noop),
+    ]
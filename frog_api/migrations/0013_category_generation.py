@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("frog_api", "0012_latestentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="generation",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("frog_api", "0013_category_generation"),
+    ]
+
+    operations = [
+        # Add the composite indexes before dropping the foreign key indexes they replace
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(
+                fields=["category", "-timestamp", "-id"],
+                name="entry_category_timestamp",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="measure",
+            index=models.Index(fields=["entry", "type"], name="measure_entry_type"),
+        ),
+        migrations.AlterField(
+            model_name="entry",
+            name="category",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="frog_api.category",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="measure",
+            name="entry",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="measures",
+                to="frog_api.entry",
+            ),
+        ),
+    ]
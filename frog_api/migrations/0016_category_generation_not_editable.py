@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("frog_api", "0015_ingestjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="category",
+            name="generation",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Any
 from django.db import models
 from django.utils.crypto import get_random_string
 
@@ -57,12 +58,26 @@ class Category(models.Model):
     slug = models.SlugField(max_length=255)
     name = models.CharField(max_length=255)
 
+    # Bumped whenever entries are added, so readers can tell cheaply whether anything changed.
+    # Only ever changed with F() updates; caches are keyed by it, so writing back a value read
+    # before an upload would make them serve data from before the upload again.
+    generation = models.PositiveIntegerField(default=0, editable=False)
+
     class Meta:
         verbose_name_plural = "Categories"
 
     def __str__(self) -> str:
         return f"{self.version} {self.slug}"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "generation"
+            ]
+        super().save(*args, **kwargs)
+
 
 # A snapshot in time of progress, tied to a Category
 class Entry(models.Model):
@@ -70,7 +85,8 @@ class Entry(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
-    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    # Indexed by the (category, -timestamp) index below
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, db_index=False)
     timestamp = models.IntegerField()
     git_hash = models.CharField(max_length=40)
     description = models.TextField(blank=True)
@@ -83,6 +99,13 @@ class Entry(models.Model):
                 fields=["timestamp", "git_hash", "category"], name="unique entry"
             )
         ]
+        indexes = [
+            # A category's history, newest first, with ties broken by id
+            models.Index(
+                fields=["category", "-timestamp", "-id"],
+                name="entry_category_timestamp",
+            ),
+        ]
 
     def __str__(self) -> str:
         time_string = datetime.utcfromtimestamp(self.timestamp).strftime(
@@ -97,9 +120,85 @@ class Measure(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
-    entry = models.ForeignKey(Entry, on_delete=models.CASCADE, related_name="measures")
+    # Indexed by the (entry, type) index below
+    entry = models.ForeignKey(
+        Entry, on_delete=models.CASCADE, related_name="measures", db_index=False
+    )
     type = models.CharField(max_length=255)
     value = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            # An entry's measures, optionally of a given type
+            models.Index(fields=["entry", "type"], name="measure_entry_type"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.entry} {self.type}: {self.value}"
+
+
+# The most recent Entry of a Category, with its measures inlined so it can be read in a single lookup
+class LatestEntry(models.Model):
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="latest_entry",
+    )
+    last_updated = models.DateTimeField(auto_now=True)
+
+    # Cleared when the entry is deleted, which marks the row as stale
+    entry = models.OneToOneField(
+        Entry, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    timestamp = models.IntegerField()
+    git_hash = models.CharField(max_length=40)
+    description = models.TextField(blank=True)
+    measures = models.JSONField(default=dict)
+
+    class Meta:
+        verbose_name_plural = "Latest entries"
+
+    def __str__(self) -> str:
+        return f"{self.category} latest"
+
+
+# An upload queued to be written by the ingest_worker command, rather than while the client waits
+class IngestJob(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    id = models.AutoField(primary_key=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    version = models.ForeignKey(
+        Version, on_delete=models.CASCADE, related_name="ingest_jobs"
+    )
+    on_conflict = models.CharField(max_length=16)
+    # The uploaded entries, as they were sent. Cleared once they're all written
+    payload = models.JSONField(default=list)
+
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    entries_total = models.PositiveIntegerField()
+    # Entries are written in chunks, each committed along with this count, so a job can resume
+    entries_done = models.PositiveIntegerField(default=0)
+    # Totals of the counts an upload responds with
+    result = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    started_on = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest queued job
+            models.Index(fields=["status", "id"], name="ingest_job_status"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.version} job {self.id} ({self.status})"
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from typing import Any, Collection, Optional, Sequence
+
+from django.db.models import QuerySet
+
+from frog_api.models import Entry, Measure
+
+EntryT = dict[str, Any]
+
+# The measure types to read, or None for all of them
+MeasureTypesT = Optional[Collection[str]]
+
+# Entry ids per query when reading the measures of entries already fetched, well under SQLite's
+# limit on query parameters
+MEASURES_CHUNK_SIZE = 10000
+
+
+def read_measures(
+    measures: QuerySet[Measure], measure_types: MeasureTypesT = None
+) -> dict[int, dict[str, int]]:
+    """
+    Reads measures grouped by the id of their entry.
+    """
+    if measure_types is not None:
+        measures = measures.filter(type__in=measure_types)
+
+    ret: dict[int, dict[str, int]] = defaultdict(dict)
+    for entry_id, type, value in measures.order_by("id").values_list(
+        "entry_id", "type", "value"
+    ):
+        ret[entry_id][type] = value
+    return ret
+
+
+def read_entry_measures(
+    entry_ids: Sequence[int], measure_types: MeasureTypesT = None
+) -> dict[int, dict[str, int]]:
+    """
+    Reads the measures of the given entries grouped by the id of their entry, MEASURES_CHUNK_SIZE
+    entries per query.
+    The ids are those of rows already fetched. Selecting the entries again in a subquery could pick
+    different ones if entries were committed in between.
+    """
+    ret: dict[int, dict[str, int]] = {}
+    for start in range(0, len(entry_ids), MEASURES_CHUNK_SIZE):
+        chunk = entry_ids[start : start + MEASURES_CHUNK_SIZE]
+        measures = Measure.objects.filter(entry_id__in=chunk)
+        ret.update(read_measures(measures, measure_types))
+    return ret
+
+
+def project_measures(entry: EntryT, measure_types: MeasureTypesT) -> EntryT:
+    """
+    Returns a copy of an entry that only has the given measures.
+    """
+    if measure_types is None:
+        return entry
+
+    measures = {t: v for t, v in entry["measures"].items() if t in measure_types}
+    return {**entry, "measures": measures}
+
+
+def read_entries_keyed(
+    entries: QuerySet[Entry], key: str, measure_types: MeasureTypesT = None
+) -> list[tuple[Any, EntryT]]:
+    """
+    Reads entries in the same shape as EntrySerializer, each paired with the value of its `key` field.
+    This takes two queries, plus one per MEASURES_CHUNK_SIZE entries past the first chunk.
+    """
+    rows = list(entries.values_list(key, "id", "timestamp", "git_hash", "description"))
+    measures = read_entry_measures([row[1] for row in rows], measure_types)
+
+    return [
+        (
+            key_value,
+            {
+                "timestamp": timestamp,
+                "git_hash": git_hash,
+                "measures": measures.get(id, {}),
+                "description": description,
+            },
+        )
+        for key_value, id, timestamp, git_hash, description in rows
+    ]
+
+
+def read_entries(
+    entries: QuerySet[Entry], measure_types: MeasureTypesT = None
+) -> list[EntryT]:
+    """
+    Reads entries in the same shape as EntrySerializer, in two queries for up to MEASURES_CHUNK_SIZE
+    entries.
+    """
+    return [entry for _, entry in read_entries_keyed(entries, "id", measure_types)]
@@ -0,0 +1,10 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    Renders entries as parallel arrays rather than a list of objects.
+    The views build the columns themselves, so this only marks the selected format.
+    """
+
+    format = "columnar"
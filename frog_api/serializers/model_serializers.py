@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from frog_api.models import Entry, Measure, Project, Version
+from frog_api.models import Entry, IngestJob, Measure, Project, Version
 
 
 class VersionSerializer(serializers.HyperlinkedModelSerializer):
@@ -44,3 +44,25 @@ class EntrySerializer(serializers.HyperlinkedModelSerializer):
             "measures",
             "description",
         ]
+
+
+class IngestJobSerializer(serializers.ModelSerializer):  # type:ignore
+    project = serializers.CharField(source="version.project.slug")
+    version = serializers.CharField(source="version.slug")
+
+    class Meta:
+        model = IngestJob
+        fields = [
+            "id",
+            "project",
+            "version",
+            "status",
+            "on_conflict",
+            "entries_total",
+            "entries_done",
+            "result",
+            "error",
+            "created_on",
+            "started_on",
+            "finished_on",
+        ]
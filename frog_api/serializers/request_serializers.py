@@ -1,3 +1,7 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any
+
 from rest_framework import serializers
 from frog_api.models import AUTH_KEY_LEN
 from frog_api.serializers.model_serializers import ProjectSerializer
@@ -37,3 +41,70 @@ class CreateEntriesSerializer(serializers.Serializer):  # type:ignore
     entries = serializers.ListField(
         child=CreateEntrySerializer(), required=True, allow_empty=False
     )
+
+
+# The first line of an NDJSON upload, before one entry per line
+class UploadHeaderSerializer(serializers.Serializer):  # type:ignore
+    api_key = ApiKeySerializer()
+
+
+# Entries queued for the ingest worker are validated by it, a chunk at a time
+class QueueEntriesSerializer(serializers.Serializer):  # type:ignore
+    api_key = ApiKeySerializer()
+    entries = serializers.ListField(required=True, allow_empty=False)
+
+
+# Classes for validating requests to read a range of entries
+MAX_ENTRIES_LIMIT = 5000
+
+# A cursor maps category slugs to the (timestamp, id) of the last entry returned for them
+CursorT = dict[str, tuple[int, int]]
+
+# Entry timestamps and ids are 32-bit integer columns, which reject values outside this range
+MIN_INTEGER = -(2**31)
+MAX_INTEGER = 2**31 - 1
+
+
+def encode_cursor(positions: CursorT) -> str:
+    raw = json.dumps(positions, separators=(",", ":")).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorT:
+    raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    positions: dict[str, Any] = json.loads(raw)
+    ret = {str(slug): (int(ts), int(id)) for slug, (ts, id) in positions.items()}
+    for ts, id in ret.values():
+        if not (MIN_INTEGER <= ts <= MAX_INTEGER and MIN_INTEGER <= id <= MAX_INTEGER):
+            raise ValueError("Cursor position out of range")
+    return ret
+
+
+class EntriesRangeSerializer(serializers.Serializer):  # type:ignore
+    since = serializers.IntegerField(
+        required=False, min_value=MIN_INTEGER, max_value=MAX_INTEGER
+    )
+    until = serializers.IntegerField(
+        required=False, min_value=MIN_INTEGER, max_value=MAX_INTEGER
+    )
+    limit = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_ENTRIES_LIMIT
+    )
+    cursor = serializers.CharField(required=False)
+
+    def validate_cursor(self, value: str) -> CursorT:
+        try:
+            return decode_cursor(value)
+        except (ValueError, TypeError, AttributeError, OverflowError):
+            raise serializers.ValidationError("Invalid cursor")
+
+
+# Class for validating requests to read a downsampled series of entries
+MAX_DOWNSAMPLE_POINTS = 2000
+
+
+class DownsampleSerializer(serializers.Serializer):  # type:ignore
+    measure = serializers.CharField()
+    points = serializers.IntegerField(
+        required=False, default=500, min_value=3, max_value=MAX_DOWNSAMPLE_POINTS
+    )
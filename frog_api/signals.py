@@ -0,0 +1,99 @@
+import threading
+from typing import Any, Optional
+
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from frog_api.cache import bump_structure_generation
+from frog_api.latest import refresh_latest_entry
+from frog_api.models import Category, Entry, Measure, Project, Version
+
+# The origin of the deletion being handled, and the categories already bumped for it
+_deletion = threading.local()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Version)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Version)
+@receiver(post_delete, sender=Category)
+def structure_changed(sender: Any, **kwargs: Any) -> None:
+    """
+    Invalidates the slug lookups of every worker when a project, version or category changes,
+    whether through the API or the admin.
+    """
+    bump_structure_generation()
+
+
+def entries_changed(category_id: Optional[int]) -> None:
+    """
+    Marks the entries of a category as changed, so that everything cached about them is rebuilt,
+    and recomputes its latest entry, whose measures or description may have been the ones changed.
+    """
+    if category_id is None:
+        return
+    with transaction.atomic():
+        Category.objects.filter(id=category_id).update(
+            generation=F("generation") + 1, last_updated=timezone.now()
+        )
+        refresh_latest_entry(category_id)
+
+
+def _deleted_by_itself(sender: Any, origin: Any) -> bool:
+    # Rows deleted along with their entry or category are handled there, if at all
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is sender
+
+
+def _first_deleted(origin: Any, category_id: Optional[int]) -> bool:
+    # A queryset deletion sends a signal per row, but each category only needs handling once
+    if getattr(_deletion, "origin", None) is not origin:
+        _deletion.origin = origin
+        _deletion.category_ids = set()
+    if category_id in _deletion.category_ids:
+        return False
+    _deletion.category_ids.add(category_id)
+    return True
+
+
+def _category_of_measure(measure: Measure) -> Optional[int]:
+    return (
+        Entry.objects.filter(id=measure.entry_id)
+        .values_list("category_id", flat=True)
+        .first()
+    )
+
+
+# Uploads write entries and measures in bulk, which sends no signals, and mark their categories as
+# changed themselves. These catch changes made through the admin or the ORM.
+
+
+@receiver(post_save, sender=Entry)
+def entry_saved(sender: Any, instance: Entry, **kwargs: Any) -> None:
+    entries_changed(instance.category_id)
+
+
+@receiver(post_delete, sender=Entry)
+def entry_deleted(sender: Any, instance: Entry, origin: Any, **kwargs: Any) -> None:
+    if not _deleted_by_itself(sender, origin):
+        return
+    if _first_deleted(origin, instance.category_id):
+        entries_changed(instance.category_id)
+
+
+@receiver(post_save, sender=Measure)
+def measure_saved(sender: Any, instance: Measure, **kwargs: Any) -> None:
+    entries_changed(_category_of_measure(instance))
+
+
+@receiver(post_delete, sender=Measure)
+def measure_deleted(sender: Any, instance: Measure, origin: Any, **kwargs: Any) -> None:
+    if not _deleted_by_itself(sender, origin):
+        return
+    category_id = _category_of_measure(instance)
+    if _first_deleted(origin, category_id):
+        entries_changed(category_id)
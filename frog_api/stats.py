@@ -0,0 +1,154 @@
+import pickle
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from django.core.cache import cache
+
+# The kinds of data kept in the cache, each counted separately
+CACHE_FAMILIES = ("entries", "downsample", "latest", "shield", "digest", "response")
+
+CACHE_COUNTERS = ("hits", "misses", "sets", "bytes", "invalidations")
+
+# Upper bounds of the rebuild latency histogram buckets, in milliseconds
+REBUILD_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# How often each worker adds its counts to the totals shared by all workers, in seconds
+STATS_FLUSH_INTERVAL = 10
+
+STATS_KEY_PREFIX = "stats"
+
+# Items of a long list pickled to estimate its size
+SIZE_SAMPLE_LENGTH = 20
+
+_BUCKETS = [*(str(bound) for bound in REBUILD_BUCKETS_MS), "inf"]
+
+_pending: Counter[str] = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _stats_key(family: str, counter: str) -> str:
+    return f"{STATS_KEY_PREFIX}_{family}_{counter}"
+
+
+def _stats_keys() -> list[str]:
+    buckets = [f"rebuild_le_{bucket}" for bucket in _BUCKETS]
+    counters = [*CACHE_COUNTERS, "rebuild_count", "rebuild_ms", *buckets]
+    return [
+        _stats_key(family, counter) for family in CACHE_FAMILIES for counter in counters
+    ]
+
+
+def record(family: str, counter: str, amount: int = 1) -> None:
+    """
+    Counts a cache event. Counts are kept in memory and periodically flushed to the cache.
+    """
+    global _last_flush
+
+    with _pending_lock:
+        _pending[_stats_key(family, counter)] += amount
+        if time.monotonic() - _last_flush < STATS_FLUSH_INTERVAL:
+            return
+        _last_flush = time.monotonic()
+
+    flush_stats()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimates the pickled size of a value.
+    Long lists, such as histories, are estimated from evenly spaced items rather than pickled whole.
+    """
+    if isinstance(value, list) and len(value) > SIZE_SAMPLE_LENGTH:
+        step = len(value) / SIZE_SAMPLE_LENGTH
+        sample = [value[int(i * step)] for i in range(SIZE_SAMPLE_LENGTH)]
+        sample_size = len(pickle.dumps(sample, pickle.HIGHEST_PROTOCOL))
+        return sample_size * len(value) // SIZE_SAMPLE_LENGTH
+    return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def record_set(family: str, size: int) -> None:
+    """
+    Counts a value written to the cache, along with its size in bytes.
+    """
+    record(family, "sets")
+    record(family, "bytes", size)
+
+
+def record_lookup(family: str, value: Any) -> None:
+    """
+    Counts a cache lookup as a hit or a miss, depending on whether it found a value.
+    """
+    record(family, "misses" if value is None else "hits")
+
+
+@contextmanager
+def timed_rebuild(family: str) -> Iterator[None]:
+    """
+    Adds the time taken to compute data that wasn't cached to the family's latency histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        bucket = next(
+            (b for b, bound in zip(_BUCKETS, REBUILD_BUCKETS_MS) if ms <= bound), "inf"
+        )
+        record(family, f"rebuild_le_{bucket}")
+        record(family, "rebuild_count")
+        record(family, "rebuild_ms", round(ms))
+
+
+def flush_stats() -> None:
+    """
+    Adds the counts of this worker to the totals shared by all workers.
+    """
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+
+    for key, amount in pending.items():
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Evicted in the meantime
+            cache.set(key, amount, None)
+
+
+def get_stats() -> dict[str, dict[str, Any]]:
+    """
+    Returns the counts of every cache family, totalled over all workers.
+    """
+    flush_stats()
+    totals = cache.get_many(_stats_keys())
+
+    def total(family: str, counter: str) -> int:
+        return totals.get(_stats_key(family, counter), 0)
+
+    stats = {}
+    for family in CACHE_FAMILIES:
+        stats[family] = {
+            **{counter: total(family, counter) for counter in CACHE_COUNTERS},
+            "rebuilds": {
+                "count": total(family, "rebuild_count"),
+                "total_ms": total(family, "rebuild_ms"),
+                "buckets_ms": {
+                    bucket: total(family, f"rebuild_le_{bucket}") for bucket in _BUCKETS
+                },
+            },
+        }
+    return stats
+
+
+def reset_stats() -> None:
+    """
+    Clears the counts of every cache family, including the ones this worker hasn't flushed yet.
+    """
+    with _pending_lock:
+        _pending.clear()
+    cache.delete_many(_stats_keys())
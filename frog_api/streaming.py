@@ -0,0 +1,115 @@
+import json
+from itertools import count, islice
+from typing import IO, Any, Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from frog_api.cache import get_entries_cache
+from frog_api.exceptions import InvalidDataException
+from frog_api.models import Category, Entry, Measure
+from frog_api.readers import MeasureTypesT, read_measures
+
+STREAM_CHUNK_SIZE = 1000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Lines of NDJSON uploads are read whole, so one missing a newline mustn't take the rest of the body
+MAX_NDJSON_LINE_LENGTH = 1024 * 1024
+
+_renderer = JSONRenderer()
+
+
+def _render(data: Any) -> bytes:
+    return _renderer.render(data)
+
+
+def iter_entries_json(
+    category: Category, measure_types: MeasureTypesT = None
+) -> Iterator[bytes]:
+    """
+    Yields the comma-separated JSON encoded entries of a category, newest first, a chunk at a time.
+    """
+    rows = (
+        Entry.objects.filter(category=category)
+        .order_by("-timestamp", "-id")
+        .values_list("id", "timestamp", "git_hash", "description")
+        .iterator(chunk_size=STREAM_CHUNK_SIZE)
+    )
+
+    separator = b""
+    while chunk := list(islice(rows, STREAM_CHUNK_SIZE)):
+        measures = read_measures(
+            Measure.objects.filter(entry_id__in=[row[0] for row in chunk]),
+            measure_types,
+        )
+
+        entries = [
+            {
+                "timestamp": timestamp,
+                "git_hash": git_hash,
+                "measures": measures.get(id, {}),
+                "description": description,
+            }
+            for id, timestamp, git_hash, description in chunk
+        ]
+
+        # Strip the list brackets so chunks can be joined into a single list
+        yield separator + _render(entries)[1:-1]
+        separator = b","
+
+
+def _iter_category_json(
+    category: Category, measure_types: MeasureTypesT
+) -> Iterator[bytes]:
+    cached = get_entries_cache(category.id, category.generation, measure_types)
+    if cached is not None:
+        yield _render(cached)[1:-1]
+    else:
+        yield from iter_entries_json(category, measure_types)
+
+
+def stream_all_entries(
+    project_slug: str,
+    version_slug: str,
+    categories: Iterable[Category],
+    measure_types: MeasureTypesT = None,
+) -> StreamingHttpResponse:
+    """
+    Streams the full history of the given categories in the same shape as the mode=all responses,
+    without ever holding a whole history in memory.
+    """
+
+    def generate() -> Iterator[bytes]:
+        yield b"{" + _render(project_slug) + b":{" + _render(version_slug) + b":{"
+
+        separator = b""
+        for category in categories:
+            yield separator + _render(category.slug) + b":["
+            yield from _iter_category_json(category, measure_types)
+            yield b"]"
+            separator = b","
+
+        yield b"}}}"
+
+    return StreamingHttpResponse(generate(), content_type="application/json")
+
+
+def iter_ndjson(stream: IO[bytes]) -> Iterator[tuple[int, Any]]:
+    """
+    Yields the line numbers and values of an NDJSON body, reading it a line at a time. Blank lines are skipped.
+    """
+    for number in count(1):
+        line = stream.readline(MAX_NDJSON_LINE_LENGTH + 1)
+        if not line:
+            return
+        if len(line) > MAX_NDJSON_LINE_LENGTH:
+            raise InvalidDataException(f"Line {number} is too long")
+        if not line.strip():
+            continue
+
+        try:
+            value = json.loads(line)
+        except ValueError:
+            raise InvalidDataException(f"Line {number} is not valid JSON")
+        yield number, value
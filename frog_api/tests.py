@@ -1,8 +1,124 @@
+import gzip
+import json
+import multiprocessing
+import pickle
+import threading
+import time
+from base64 import urlsafe_b64encode
+from functools import partial
+from io import StringIO
+from typing import Any, Callable, Optional
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+
+from frog_api.cache import (
+    LOCAL_STRUCTURE_GENERATION_TIMEOUT,
+    STRUCTURE_GENERATION_TTL,
+    get_digest_cache,
+    get_entries_cache,
+    get_latest_cache,
+    lock_entries_rebuild,
+    unlock_entries_rebuild,
+)
+from frog_api.compression import choose_encoding
+from frog_api.conditional import project_change_token, root_change_token
+from frog_api.downsample import largest_triangle_three_buckets
+from frog_api.exceptions import (
+    NonexistentCategoryException,
+    NonexistentVersionException,
+)
+from frog_api.models import (
+    Category,
+    Entry,
+    IngestJob,
+    LatestEntry,
+    Measure,
+    Project,
+    Version,
+)
+from frog_api.readers import read_entries, read_entry_measures
+from frog_api.serializers.model_serializers import EntrySerializer
+from frog_api.serializers.request_serializers import encode_cursor
+from frog_api.stats import estimate_size, get_stats, reset_stats
+from frog_api.views.data import (
+    get_all_entries,
+    get_category_downsampled_entries,
+    get_columnar_range,
+    get_versions_digest,
+)
+from frog_api.views.common import get_category, get_project, get_version
+
+
+class SampleProjectMixin(SimpleTestCase):
+    """
+    Creates the oot project with its us version and `category_slugs` categories, and posts entries to them
+    """
+
+    client: APIClient
+    category_slugs = ["default"]
+
+    def setUp(self) -> None:
+        cache.clear()
+
+        self.project = Project(
+            slug="oot", name="Ocarina of Time", auth_key="test_key_123"
+        )
+        self.project.save()
+
+        self.version = Version(slug="us", name="US", project=self.project)
+        self.version.save()
+
+        self.categories = {
+            slug: Category.objects.create(
+                slug=slug, name=slug.capitalize(), version=self.version
+            )
+            for slug in self.category_slugs
+        }
+
+    def post_entry_data(
+        self, entries: list[dict[str, Any]], client: Optional[APIClient] = None
+    ) -> None:
+        response = (client or self.client).post(
+            reverse("version-data", args=["oot", "us"]),
+            {"api_key": "test_key_123", "entries": entries},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def post_entry(self, timestamp: int, code: int) -> None:
+        self.post_entry_data(
+            [
+                {
+                    "categories": {"default": {"code": code, "code/total": 100}},
+                    "timestamp": timestamp,
+                    "git_hash": str(timestamp),
+                }
+            ]
+        )
 
-from frog_api.models import Category, Entry, Measure, Project, Version
+    def post_entries(
+        self, *timestamps: int, git_hash: str = "", client: Optional[APIClient] = None
+    ) -> None:
+        self.post_entry_data(
+            [
+                {
+                    "categories": {"default": {"code": i, "code/total": 100}},
+                    "timestamp": i,
+                    "git_hash": f"{git_hash}{i}",
+                }
+                for i in timestamps
+            ],
+            client,
+        )
 
 
 class CreateCategoryTests(APITestCase):
@@ -71,6 +187,9 @@ SAMPLE_DATA = {
 
 
 class CreateEntriesTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
     def create_project_metadata(self, project_slug: str, version_slug: str) -> None:
         # Create a test Project, Version, and Categories
         project = Project(
@@ -134,6 +253,229 @@ class CreateEntriesTests(APITestCase):
         self.assertEqual(Entry.objects.count(), 2)
         self.assertEqual(Measure.objects.count(), 10)
 
+    def test_skip_existing_entries(self) -> None:
+        """
+        Ensure that existing entries are left alone when uploading with on_conflict=skip
+        """
+
+        self.create_project_metadata(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG)
+        url = reverse("version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG])
+
+        self.client.post(url, SAMPLE_DATA, format="json")
+
+        data = {
+            "api_key": "test_key_123",
+            "entries": [
+                {
+                    "categories": {"default": {"code": 1}},
+                    "timestamp": 1615435438,
+                    "git_hash": "e788bfecbfb10afd4182332db99bb562ea75b1de",
+                },
+                {
+                    "categories": {"default": {"code": 2}},
+                    "timestamp": 1615435439,
+                    "git_hash": "f788bfecbfb10afd4182332db99bb562ea75b1de",
+                },
+            ],
+        }
+        response = self.client.post(f"{url}?on_conflict=skip", data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.json(),
+            {
+                "result": "success",
+                "wrote": 2,
+                "inserted": 1,
+                "skipped": 1,
+                "updated": 0,
+            },
+        )
+        self.assertEqual(Entry.objects.count(), 3)
+        self.assertEqual(Measure.objects.count(), 11)
+        self.assertFalse(Measure.objects.filter(type="code", value=1).exists())
+
+    def test_update_existing_entries(self) -> None:
+        """
+        Ensure that the measures of existing entries are replaced when uploading with on_conflict=update
+        """
+
+        self.create_project_metadata(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG)
+        url = reverse("version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG])
+
+        self.client.post(url, SAMPLE_DATA, format="json")
+        # Cache the history and latest entry
+        get_all_entries(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG, "default")
+        self.client.get(f"{url}?mode=latest")
+
+        data = {
+            "api_key": "test_key_123",
+            "entries": [
+                {
+                    "categories": {"default": {"code": 1}},
+                    "timestamp": 1615435438,
+                    "git_hash": "e788bfecbfb10afd4182332db99bb562ea75b1de",
+                },
+            ],
+        }
+        response = self.client.post(f"{url}?on_conflict=update", data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.json(),
+            {
+                "result": "success",
+                "wrote": 2,
+                "inserted": 0,
+                "skipped": 0,
+                "updated": 1,
+            },
+        )
+        self.assertEqual(Entry.objects.count(), 2)
+        # The actors entry is untouched
+        self.assertEqual(Measure.objects.count(), 3)
+
+        entries = get_all_entries(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG, "default")
+        self.assertEqual([entry["measures"] for entry in entries], [{"code": 1}])
+
+        response = self.client.get(f"{url}?mode=latest")
+        self.assertEqual(
+            response.json()[SAMPLE_PROJECT_SLUG][SAMPLE_VERSION_SLUG]["default"][0][
+                "measures"
+            ],
+            {"code": 1},
+        )
+
+    def test_invalid_on_conflict(self) -> None:
+        """
+        Ensure that an unknown on_conflict value is rejected
+        """
+
+        self.create_project_metadata(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG)
+
+        response = self.client.post(
+            reverse("version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG])
+            + "?on_conflict=replace",
+            SAMPLE_DATA,
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Entry.objects.count(), 0)
+
+    @override_settings(INGEST_BATCH_SIZE=10)
+    def test_create_entries_in_batches(self) -> None:
+        """
+        Ensure that entries and their measures are inserted in batches, each measure with its entry
+        """
+
+        self.create_project_metadata(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG)
+
+        data = {
+            "api_key": "test_key_123",
+            "entries": [
+                {
+                    "categories": {
+                        "default": {"code": i, "data": i * 2},
+                        "actors": {"code": i * 3},
+                    },
+                    "timestamp": i,
+                    "git_hash": str(i),
+                }
+                for i in range(25)
+            ],
+        }
+
+        for can_return_rows in (True, False):
+            Entry.objects.all().delete()
+            with mock.patch.object(
+                type(connection.features),
+                "can_return_rows_from_bulk_insert",
+                can_return_rows,
+            ):
+                response = self.client.post(
+                    reverse(
+                        "version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG]
+                    ),
+                    data,
+                    format="json",
+                )
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.json()["wrote"], 125)
+            for measure in Measure.objects.select_related("entry__category"):
+                factor = {"code": 1, "data": 2}[measure.type]
+                if measure.entry.category.slug == "actors":
+                    factor = 3
+                self.assertEqual(measure.value, measure.entry.timestamp * factor)
+
+    def test_missing_categories(self) -> None:
+        """
+        Ensure that every missing category is reported at once, and nothing is created
+        """
+
+        self.create_project_metadata(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG)
+
+        data = {
+            "api_key": "test_key_123",
+            "entries": [
+                {
+                    "categories": {"default": {"code": 1}, "objects": {"code": 2}},
+                    "timestamp": 100,
+                    "git_hash": "abc",
+                },
+                {
+                    "categories": {"scenes": {"code": 3}},
+                    "timestamp": 200,
+                    "git_hash": "def",
+                },
+            ],
+        }
+        response = self.client.post(
+            reverse("version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG]),
+            data,
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["detail"], "Categories 'objects', 'scenes' do not exist"
+        )
+        self.assertEqual(Entry.objects.count(), 0)
+
+    def test_category_lookups_batched(self) -> None:
+        """
+        Ensure that the number of queries made by an upload doesn't depend on its number of entries
+        """
+
+        self.create_project_metadata(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG)
+
+        def post(timestamps: range) -> int:
+            data = {
+                "api_key": "test_key_123",
+                "entries": [
+                    {
+                        "categories": {"default": {"code": i}, "actors": {"code": i}},
+                        "timestamp": i,
+                        "git_hash": str(i),
+                    }
+                    for i in timestamps
+                ],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse(
+                        "version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG]
+                    ),
+                    data,
+                    format="json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+
+        post(range(1))
+        self.assertEqual(post(range(10, 15)), post(range(100, 150)))
+
     def test_atomicity(self) -> None:
         """
         Ensure that if some entries fail to be created, none are created
@@ -178,3 +520,1742 @@ class CreateEntriesTests(APITestCase):
 
         self.assertEqual(Entry.objects.count(), 0)
         self.assertEqual(Measure.objects.count(), 0)
+
+
+class IngestJobTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        project = Project.objects.create(
+            slug=SAMPLE_PROJECT_SLUG, name="Ocarina of Time", auth_key="test_key_123"
+        )
+        version = Version.objects.create(
+            slug=SAMPLE_VERSION_SLUG, name="US", project=project
+        )
+        Category.objects.create(slug="default", name="Default", version=version)
+
+        self.url = reverse(
+            "version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG]
+        )
+
+    def entries(self, *timestamps: int) -> list[dict[str, Any]]:
+        return [
+            {
+                "categories": {"default": {"code": timestamp}},
+                "timestamp": timestamp,
+                "git_hash": str(timestamp),
+            }
+            for timestamp in timestamps
+        ]
+
+    def work(self, *args: str) -> None:
+        call_command("ingest_worker", "--once", *args, stdout=StringIO())
+
+    def get_job(self, url: str) -> dict[str, Any]:
+        response = self.client.get(url, headers={"X-API-Key": "test_key_123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_queue_entries(self) -> None:
+        """
+        Ensure that async uploads are queued, and written by the ingest worker
+        """
+
+        data = {"api_key": "test_key_123", "entries": self.entries(100, 200, 300)}
+        response = self.client.post(f"{self.url}?async=true", data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_url = response["Location"]
+        self.assertEqual(job_url, response.json()["url"])
+        self.assertEqual(Entry.objects.count(), 0)
+        self.assertEqual(self.get_job(job_url)["status"], "queued")
+
+        with override_settings(INGEST_CHUNK_SIZE=2):
+            self.work()
+
+        self.assertEqual(Entry.objects.count(), 3)
+        job = self.get_job(job_url)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["entries_done"], 3)
+        self.assertEqual(
+            job["result"], {"wrote": 6, "inserted": 3, "skipped": 0, "updated": 0}
+        )
+        self.assertEqual(IngestJob.objects.get().payload, [])
+
+        entries = get_all_entries(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG, "default")
+        self.assertEqual([entry["timestamp"] for entry in entries], [300, 200, 100])
+
+    def test_queue_entries_checks_api_key(self) -> None:
+        """
+        Ensure that async uploads are authenticated before they're queued
+        """
+
+        data = {"api_key": "wrong_key", "entries": self.entries(100)}
+        response = self.client.post(f"{self.url}?async=true", data, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(IngestJob.objects.count(), 0)
+
+    @override_settings(INGEST_CHUNK_SIZE=1)
+    def test_failed_job(self) -> None:
+        """
+        Ensure that a job stops at the first invalid chunk, keeping the chunks written before it
+        """
+
+        bad = {
+            "categories": {"objects": {"code": 1}},
+            "timestamp": 300,
+            "git_hash": "x",
+        }
+        data = {"api_key": "test_key_123", "entries": [*self.entries(100, 200), bad]}
+        response = self.client.post(f"{self.url}?async=true", data, format="json")
+
+        self.work()
+
+        job = self.get_job(response["Location"])
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["entries_done"], 2)
+        self.assertIn("Category 'objects' does not exist", job["error"])
+        self.assertEqual(Entry.objects.count(), 2)
+
+        # Entries are validated by the worker
+        data = {"api_key": "test_key_123", "entries": [{"timestamp": "soon"}]}
+        response = self.client.post(f"{self.url}?async=true", data, format="json")
+        self.work()
+
+        job = self.get_job(response["Location"])
+        self.assertEqual(job["status"], "failed")
+        self.assertIn('Invalid entries: {"0": {', job["error"])
+
+    def test_requeue_running_jobs(self) -> None:
+        """
+        Ensure that jobs left running by a stopped worker resume where they left off
+        """
+
+        data = {"api_key": "test_key_123", "entries": self.entries(100, 200)}
+        self.client.post(f"{self.url}?async=true", data, format="json")
+        # A worker wrote the first entry, then stopped
+        self.client.post(
+            self.url,
+            {"api_key": "test_key_123", "entries": self.entries(100)},
+            format="json",
+        )
+        IngestJob.objects.update(status=IngestJob.Status.RUNNING, entries_done=1)
+
+        self.work()
+        self.assertEqual(IngestJob.objects.get().status, IngestJob.Status.RUNNING)
+
+        self.work("--requeue")
+        self.assertEqual(IngestJob.objects.get().status, IngestJob.Status.DONE)
+        self.assertEqual(Entry.objects.count(), 2)
+
+    def test_job_checks_api_key(self) -> None:
+        """
+        Ensure that jobs are only shown with their project's API key, sent in a header
+        """
+
+        data = {"api_key": "test_key_123", "entries": self.entries(100)}
+        response = self.client.post(f"{self.url}?async=true", data, format="json")
+        job_url = response["Location"]
+        Project.objects.create(slug="mm", name="Majora's Mask", auth_key="mm_key")
+
+        response = self.client.get(job_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # Other projects can't tell the job exists
+        response = self.client.get(job_url, headers={"X-API-Key": "mm_key"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(job_url, {"api_key": "test_key_123"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.assertEqual(self.get_job(job_url)["status"], "queued")
+
+    def test_nonexistent_job(self) -> None:
+        """
+        Ensure that asking for a job that doesn't exist is a 404
+        """
+
+        response = self.client.get(
+            reverse("ingest-job", args=[1234]), headers={"X-API-Key": "test_key_123"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class NDJSONUploadTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        project = Project.objects.create(
+            slug=SAMPLE_PROJECT_SLUG, name="Ocarina of Time", auth_key="test_key_123"
+        )
+        version = Version.objects.create(
+            slug=SAMPLE_VERSION_SLUG, name="US", project=project
+        )
+        Category.objects.create(slug="default", name="Default", version=version)
+
+    def upload(
+        self,
+        *lines: Any,
+        query: str = "",
+        api_key: str = "test_key_123",
+        **extra: Any,
+    ) -> Any:
+        body = "\n".join(
+            line if isinstance(line, str) else json.dumps(line)
+            for line in [{"api_key": api_key}, *lines]
+        )
+        url = reverse("version-data", args=[SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG])
+        return self.client.post(
+            url + query, body, content_type="application/x-ndjson", **extra
+        )
+
+    def entry(self, timestamp: int, category: str = "default") -> dict[str, Any]:
+        return {
+            "categories": {category: {"code": timestamp, "total": 1000}},
+            "timestamp": timestamp,
+            "git_hash": str(timestamp),
+        }
+
+    @override_settings(INGEST_CHUNK_SIZE=2)
+    def test_upload(self) -> None:
+        """
+        Ensure that entries uploaded one per line are written a chunk at a time
+        """
+
+        response = self.upload(*(self.entry(t) for t in (100, 200, 300, 400, 500)))
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.json(),
+            {
+                "result": "success",
+                "wrote": 15,
+                "inserted": 5,
+                "skipped": 0,
+                "updated": 0,
+                "entries": 5,
+                "chunks": 3,
+            },
+        )
+        entries = get_all_entries(SAMPLE_PROJECT_SLUG, SAMPLE_VERSION_SLUG, "default")
+        self.assertEqual(
+            [entry["timestamp"] for entry in entries], [500, 400, 300, 200, 100]
+        )
+
+    @override_settings(INGEST_CHUNK_SIZE=2)
+    def test_resume_upload(self) -> None:
+        """
+        Ensure that a failed upload keeps the chunks before the error, and can be resumed
+        """
+
+        entries = [self.entry(t) for t in (100, 200, 300, 400, 500)]
+        response = self.upload(*entries[:3], self.entry(400, "objects"), entries[4])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(),
+            {
+                "detail": "Category 'objects' does not exist",
+                "entries_done": 2,
+                "chunks_done": 1,
+            },
+        )
+        self.assertEqual(Entry.objects.count(), 2)
+
+        response = self.upload(*entries, query="?on_conflict=skip")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["inserted"], 3)
+        self.assertEqual(response.json()["skipped"], 2)
+        self.assertEqual(Entry.objects.count(), 5)
+
+    def test_invalid_upload(self) -> None:
+        """
+        Ensure that invalid lines are reported by their line number, and nothing is written without a valid API key
+        """
+
+        response = self.upload(self.entry(100), api_key="wrong_key")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.upload(self.entry(100), "{not json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["detail"], "Line 3 is not valid JSON")
+
+        response = self.upload(self.entry(100), "", {"timestamp": "soon"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(response.json()["detail"].startswith('Invalid entries: {"4": '))
+
+        response = self.upload(query="?async=true")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Sent chunked, as servers pass it on without a Content-Length
+        response = self.upload(
+            self.entry(100), CONTENT_LENGTH="", HTTP_TRANSFER_ENCODING="chunked"
+        )
+        self.assertEqual(response.status_code, status.HTTP_411_LENGTH_REQUIRED)
+
+        self.assertEqual(Entry.objects.count(), 0)
+
+
+class DigestTests(APITestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def create_project(self, project_slug: str, num_versions: int) -> None:
+        project = Project(slug=project_slug, name=project_slug, auth_key="test_key_123")
+        project.save()
+
+        for i in range(num_versions):
+            version = Version(slug=f"v{i}", name=f"V{i}", project=project)
+            version.save()
+
+            for category_slug in ["default", "actors", "empty"]:
+                category = Category(slug=category_slug, name="C", version=version)
+                category.save()
+
+                if category_slug == "empty":
+                    continue
+
+                for timestamp in [100, 300, 200]:
+                    entry = Entry(
+                        category=category, timestamp=timestamp, git_hash=str(timestamp)
+                    )
+                    entry.save()
+                    Measure(entry=entry, type="code", value=timestamp).save()
+                    Measure(entry=entry, type="code/total", value=1000).save()
+
+    def test_root_digest(self) -> None:
+        """
+        Ensure that the root digest returns the latest entry of each category
+        """
+
+        self.create_project("oot", 2)
+        Project(slug="mm", name="Majora's Mask").save()
+
+        response = self.client.get(reverse("root-data"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data.keys()), ["oot", "mm"])
+        self.assertEqual(response.data["mm"], {})
+        self.assertEqual(list(response.data["oot"].keys()), ["v0", "v1"])
+        self.assertEqual(list(response.data["oot"]["v0"].keys()), ["default", "actors"])
+        self.assertEqual(
+            response.data["oot"]["v1"]["actors"],
+            [
+                {
+                    "timestamp": 300,
+                    "git_hash": "300",
+                    "measures": {"code": 300, "code/total": 1000},
+                    "description": "",
+                }
+            ],
+        )
+
+    def test_digest_query_count(self) -> None:
+        """
+        Ensure that the number of queries made by the digests doesn't depend on the amount of data
+        """
+
+        self.create_project("oot", 1)
+
+        # The first queries compute the change token for conditional requests, and again for the
+        # digest cache
+        with self.assertNumQueries(10):
+            self.client.get(reverse("root-data"))
+        with self.assertNumQueries(9):
+            self.client.get(reverse("project-data", args=["oot"]))
+
+        self.create_project("mm", 5)
+        cache.clear()
+
+        with self.assertNumQueries(10):
+            self.client.get(reverse("root-data"))
+        with self.assertNumQueries(9):
+            self.client.get(reverse("project-data", args=["mm"]))
+
+        # Cached digests only need the change token
+        with self.assertNumQueries(3):
+            self.client.get(reverse("root-data"))
+        with self.assertNumQueries(2):
+            self.client.get(reverse("project-data", args=["mm"]))
+
+    def test_digest_follows_changes_outside_api(self) -> None:
+        """
+        Ensure that the digests notice versions deleted and entries edited outside the API
+        """
+
+        self.create_project("oot", 2)
+        self.client.get(reverse("root-data"))
+        self.client.get(reverse("project-data", args=["oot"]))
+
+        Version.objects.filter(slug="v0").delete()
+        measure = Measure.objects.get(
+            entry__category__version__slug="v1",
+            entry__category__slug="actors",
+            entry__timestamp=300,
+            type="code",
+        )
+        measure.value = 0
+        measure.save()
+
+        # Other query parameters miss the response cache, but not the digest cache
+        for url in [reverse("root-data"), reverse("project-data", args=["oot"])]:
+            response = self.client.get(url + "?measures=code")
+            versions = response.json()["oot"]
+            self.assertEqual(list(versions.keys()), ["v1"])
+            self.assertEqual(versions["v1"]["actors"][0]["measures"], {"code": 0})
+
+    def test_digest_built_during_change(self) -> None:
+        """
+        Ensure that a digest built while the data changes isn't served after the change
+        """
+
+        self.create_project("oot", 2)
+        build = get_versions_digest
+
+        def build_then_delete(projects: Any) -> Any:
+            digest = build(projects)
+            Version.objects.filter(slug="v0").delete()
+            return digest
+
+        with mock.patch(
+            "frog_api.views.data.get_versions_digest", side_effect=build_then_delete
+        ):
+            response = self.client.get(reverse("root-data"))
+        self.assertEqual(list(response.json()["oot"].keys()), ["v0", "v1"])
+
+        response = self.client.get(reverse("root-data") + "?measures=code")
+        self.assertEqual(list(response.json()["oot"].keys()), ["v1"])
+
+    def test_digest_entry_committed_while_reading(self) -> None:
+        """
+        Ensure that the digest reads the measures of the entries it fetched, even if newer ones are
+        committed in between
+        """
+
+        self.create_project("oot", 1)
+        category = Category.objects.get(slug="default")
+
+        def commit_then_read(*args: Any) -> Any:
+            entry = Entry.objects.create(
+                category=category, timestamp=400, git_hash="400"
+            )
+            Measure(entry=entry, type="code", value=400).save()
+            return read_entry_measures(*args)
+
+        with mock.patch(
+            "frog_api.readers.read_entry_measures", side_effect=commit_then_read
+        ):
+            digest = get_versions_digest(Project.objects.all())
+
+        entry = digest["oot"]["v0"]["default"][0]
+        self.assertEqual(entry["timestamp"], 300)
+        self.assertEqual(entry["measures"], {"code": 300, "code/total": 1000})
+
+    def test_digest_without_window_functions(self) -> None:
+        """
+        Ensure that the digest falls back to a subquery on databases without window functions
+        """
+
+        self.create_project("oot", 2)
+
+        expected = self.client.get(reverse("root-data")).json()
+        cache.clear()
+
+        with mock.patch.object(connection.features, "supports_over_clause", False):
+            response = self.client.get(reverse("root-data"))
+
+        self.assertEqual(response.json(), expected)
+
+
+class LatestEntryTests(SampleProjectMixin, APITestCase):
+    def get_latest(self) -> list[dict[str, object]]:
+        response = self.client.get(
+            reverse("category-data", args=["oot", "us", "default"])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["oot"]["us"]["default"]
+
+    def test_latest_entry_maintained_on_ingest(self) -> None:
+        """
+        Ensure that ingesting entries keeps the latest entry up to date, including backfills
+        """
+
+        self.post_entry(200, 20)
+        self.post_entry(300, 30)
+        self.post_entry(100, 10)
+
+        self.assertEqual(
+            LatestEntry.objects.get(category=self.categories["default"]).timestamp, 300
+        )
+        self.assertEqual(
+            self.get_latest(),
+            [
+                {
+                    "timestamp": 300,
+                    "git_hash": "300",
+                    "measures": {"code": 30, "code/total": 100},
+                    "description": "",
+                }
+            ],
+        )
+
+    def test_latest_entry_query_count(self) -> None:
+        """
+        Ensure that reading the latest entry doesn't depend on the length of the history
+        """
+
+        for i in range(10):
+            self.post_entry(i, i)
+
+        # The change token, the category and its generation, then the latest entry. The project and
+        # version were already resolved when posting.
+        with self.assertNumQueries(4):
+            self.get_latest()
+
+    def test_latest_entry_recomputed_when_stale(self) -> None:
+        """
+        Ensure that deleting the latest entry falls back to the previous one
+        """
+
+        self.post_entry(200, 20)
+        self.post_entry(300, 30)
+
+        Entry.objects.get(category=self.categories["default"], timestamp=300).delete()
+        cache.clear()
+
+        self.assertEqual(self.get_latest()[0]["timestamp"], 200)
+
+        Entry.objects.all().delete()
+        cache.clear()
+
+        self.assertEqual(self.get_latest(), [])
+        self.assertFalse(LatestEntry.objects.exists())
+
+    def test_latest_entry_follows_edits(self) -> None:
+        """
+        Ensure that editing the latest entry's measures or description outside uploads updates it
+        """
+
+        self.post_entry(200, 20)
+
+        measure = Measure.objects.get(type="code")
+        measure.value = 25
+        measure.save()
+        entry = Entry.objects.get()
+        entry.description = "Fixed"
+        entry.save()
+        Measure.objects.filter(type="code/total").delete()
+
+        latest = self.get_latest()[0]
+        self.assertEqual(latest["measures"], {"code": 25})
+        self.assertEqual(latest["description"], "Fixed")
+
+    def test_rebuild_latest_entries(self) -> None:
+        """
+        Ensure that the rebuild command recomputes every latest entry
+        """
+
+        self.post_entry(200, 20)
+        LatestEntry.objects.all().delete()
+
+        call_command("rebuild_latest_entries", stdout=StringIO())
+
+        latest = LatestEntry.objects.get(category=self.categories["default"])
+        self.assertEqual(latest.timestamp, 200)
+        self.assertEqual(latest.measures, {"code": 20, "code/total": 100})
+
+
+class EntriesRangeTests(SampleProjectMixin, APITestCase):
+    category_slugs = ["default", "actors"]
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        for category_slug, timestamps in [
+            ("default", range(10)),
+            ("actors", range(5, 8)),
+        ]:
+            category = self.categories[category_slug]
+            for timestamp in timestamps:
+                entry = Entry(category=category, timestamp=timestamp, git_hash="abc")
+                entry.save()
+                Measure(entry=entry, type="code", value=timestamp).save()
+
+        # Two entries sharing a timestamp must not be skipped or repeated across pages
+        entry = Entry(category=category, timestamp=6, git_hash="def")
+        entry.save()
+
+    def get_pages(self, url: str) -> list[dict[str, list[int]]]:
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(
+                {
+                    slug: [entry["timestamp"] for entry in entries]
+                    for slug, entries in response.data["oot"]["us"].items()
+                }
+            )
+            url = response.get("Link", "").partition(">")[0][1:]
+        return pages
+
+    def test_time_range(self) -> None:
+        """
+        Ensure that since and until restrict the returned entries
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        response = self.client.get(url, {"mode": "all", "since": "3", "until": "5"})
+
+        timestamps = [e["timestamp"] for e in response.data["oot"]["us"]["default"]]
+        self.assertEqual(timestamps, [5, 4, 3])
+        self.assertNotIn("Link", response)
+
+    def test_category_pagination(self) -> None:
+        """
+        Ensure that paginating a category returns every entry exactly once, newest first
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        pages = self.get_pages(f"{url}?mode=all&limit=4&since=1")
+
+        self.assertEqual(
+            pages,
+            [
+                {"default": [9, 8, 7, 6]},
+                {"default": [5, 4, 3, 2]},
+                {"default": [1]},
+            ],
+        )
+
+    def test_version_pagination(self) -> None:
+        """
+        Ensure that paginating a version pages through each category independently
+        """
+
+        url = reverse("version-data", args=["oot", "us"])
+        pages = self.get_pages(f"{url}?mode=all&limit=2")
+
+        self.assertEqual(
+            pages,
+            [
+                {"default": [9, 8], "actors": [7, 6]},
+                {"default": [7, 6], "actors": [6, 5]},
+                {"default": [5, 4], "actors": []},
+                {"default": [3, 2], "actors": []},
+                {"default": [1, 0], "actors": []},
+            ],
+        )
+
+    def test_invalid_range(self) -> None:
+        """
+        Ensure that malformed range parameters are rejected
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+
+        for param, value in [
+            ("limit", "0"),
+            ("since", "yesterday"),
+            ("since", str(2**31)),
+            ("until", str(-(2**31) - 1)),
+            ("cursor", "nonsense"),
+            ("cursor", encode_cursor({"default": (2**31, 1)})),
+            ("cursor", urlsafe_b64encode(b'{"default":[1e400,1]}').decode()),
+        ]:
+            response = self.client.get(url, {"mode": "all", param: value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DownsampleTests(SampleProjectMixin, APITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.post_entry_data(
+            [
+                {
+                    "categories": {
+                        "default": {"code": (i * 37) % 101, "code/total": 100}
+                    },
+                    "timestamp": i,
+                    "git_hash": str(i),
+                }
+                for i in range(100)
+            ]
+        )
+
+    def get_downsampled(self, points: str) -> list[dict[str, Any]]:
+        response = self.client.get(
+            reverse("category-data", args=["oot", "us", "default"]),
+            {"mode": "downsample", "measure": "code", "points": points},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["oot"]["us"]["default"]
+
+    def test_largest_triangle_three_buckets(self) -> None:
+        """
+        Ensure that downsampling keeps the endpoints and the most prominent peak
+        """
+
+        rows = [(x, 100 if x == 42 else 0) for x in range(100)]
+
+        sampled = largest_triangle_three_buckets(iter(rows), len(rows), 10)
+
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled[0], (0, 0))
+        self.assertEqual(sampled[-1], (99, 0))
+        self.assertIn((42, 100), sampled)
+        self.assertEqual(sampled, sorted(sampled))
+
+    def test_downsample(self) -> None:
+        """
+        Ensure that the downsample mode reduces a series and only returns the requested measure
+        """
+
+        entries = self.get_downsampled("10")
+
+        self.assertEqual(len(entries), 10)
+        self.assertEqual(entries[0]["timestamp"], 99)
+        self.assertEqual(entries[-1]["timestamp"], 0)
+        self.assertEqual(list(entries[0]["measures"].keys()), ["code"])
+
+        self.assertEqual(len(self.get_downsampled("500")), 100)
+
+    def test_downsample_cache_invalidated(self) -> None:
+        """
+        Ensure that ingesting new entries invalidates the downsampled series
+        """
+
+        self.assertEqual(self.get_downsampled("10")[0]["timestamp"], 99)
+
+        response = self.client.post(
+            reverse("version-data", args=["oot", "us"]),
+            {
+                "api_key": "test_key_123",
+                "entries": [
+                    {
+                        "categories": {"default": {"code": 1, "code/total": 100}},
+                        "timestamp": 1000,
+                        "git_hash": "1000",
+                    }
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.get_downsampled("10")[0]["timestamp"], 1000)
+
+    def test_downsample_cache_unknown_measures(self) -> None:
+        """
+        Ensure that the empty series of measures that don't exist aren't cached
+        """
+
+        category = Category.objects.get(slug="default")
+        reset_stats()
+
+        for i in range(10):
+            self.assertEqual(
+                get_category_downsampled_entries(category, f"nope{i}", 10), []
+            )
+        self.assertEqual(
+            len(get_category_downsampled_entries(category, "code", 10)), 10
+        )
+        self.assertEqual(
+            len(get_category_downsampled_entries(category, "code", 10)), 10
+        )
+
+        stats = get_stats()["downsample"]
+        self.assertEqual(stats["sets"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_downsample_requires_measure(self) -> None:
+        """
+        Ensure that the downsample mode rejects requests without a measure or with too few points
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+
+        response = self.client.get(url, {"mode": "downsample"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            url, {"mode": "downsample", "measure": "code", "points": "2"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StreamingTests(SampleProjectMixin, APITestCase):
+    category_slugs = ["default", "actors", "empty"]
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.post_entry_data(
+            [
+                {
+                    "categories": {
+                        "default": {"code": i, "code/total": 100},
+                        "actors": {"code": i * 2},
+                    },
+                    "timestamp": i,
+                    "git_hash": f"hash “{i}”",
+                }
+                for i in range(25)
+            ]
+        )
+
+    def assert_stream_matches(self, url: str) -> None:
+        with mock.patch("frog_api.streaming.STREAM_CHUNK_SIZE", 10):
+            streamed = self.client.get(url, {"mode": "all", "stream": "true"})
+        self.assertEqual(streamed.status_code, status.HTTP_200_OK)
+        self.assertTrue(streamed.streaming)
+        streamed_content = b"".join(streamed.streaming_content)  # type: ignore
+
+        cache.clear()
+
+        rendered = self.client.get(url, {"mode": "all"}, HTTP_ACCEPT="application/json")
+        self.assertEqual(streamed_content, rendered.content)
+
+        # Streaming from the cache gives the same result
+        streamed = self.client.get(url, {"mode": "all", "stream": "true"})
+        self.assertEqual(b"".join(streamed.streaming_content), rendered.content)  # type: ignore
+
+    def test_stream_category(self) -> None:
+        """
+        Ensure that streaming a category's history matches the regular response byte for byte
+        """
+
+        self.assert_stream_matches(
+            reverse("category-data", args=["oot", "us", "default"])
+        )
+
+    def test_stream_version(self) -> None:
+        """
+        Ensure that streaming a version's history matches the regular response byte for byte
+        """
+
+        self.assert_stream_matches(reverse("version-data", args=["oot", "us"]))
+
+
+class ColumnarTests(SampleProjectMixin, APITestCase):
+    category_slugs = ["default", "actors"]
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.post_entry_data(
+            [
+                {
+                    "categories": {"default": {"code": 1, "code/total": 10}},
+                    "timestamp": 1,
+                    "git_hash": "a",
+                },
+                {
+                    "categories": {"default": {"code": 2}, "actors": {"code": 5}},
+                    "timestamp": 2,
+                    "git_hash": "b",
+                },
+                {
+                    "categories": {"default": {"code": 3, "code/total": 10}},
+                    "timestamp": 3,
+                    "git_hash": "c",
+                },
+            ]
+        )
+
+    def test_columnar_category(self) -> None:
+        """
+        Ensure that the columnar format returns parallel arrays with nulls for missing measures
+        """
+
+        response = self.client.get(
+            reverse("category-data", args=["oot", "us", "default"]),
+            {"mode": "all", "format": "columnar"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                "oot": {
+                    "us": {
+                        "default": {
+                            "timestamps": [3, 2, 1],
+                            "git_hashes": ["c", "b", "a"],
+                            "measures": {
+                                "code": [3, 2, 1],
+                                "code/total": [10, None, 10],
+                            },
+                        }
+                    }
+                }
+            },
+        )
+
+    def test_columnar_version_pagination(self) -> None:
+        """
+        Ensure that the columnar format can be paginated like the regular one
+        """
+
+        url = reverse("version-data", args=["oot", "us"])
+        response = self.client.get(
+            url, {"mode": "all", "format": "columnar", "limit": "2"}
+        )
+
+        columns = response.json()["oot"]["us"]
+        self.assertEqual(columns["default"]["timestamps"], [3, 2])
+        self.assertEqual(columns["actors"]["measures"], {"code": [5]})
+
+        next_url = response["Link"].partition(">")[0][1:]
+        columns = self.client.get(next_url).json()["oot"]["us"]
+        self.assertEqual(columns["default"]["timestamps"], [1])
+        self.assertEqual(
+            columns["actors"], {"timestamps": [], "git_hashes": [], "measures": {}}
+        )
+
+    def test_columnar_entry_committed_while_reading(self) -> None:
+        """
+        Ensure that an entry committed between reading the entries and their measures is left out
+        """
+
+        category = Category.objects.get(slug="default")
+
+        def commit_then_read(*args: Any) -> Any:
+            entry = Entry.objects.create(category=category, timestamp=4, git_hash="d")
+            Measure(entry=entry, type="code", value=4).save()
+            return read_entry_measures(*args)
+
+        with mock.patch(
+            "frog_api.views.data.read_entry_measures", side_effect=commit_then_read
+        ):
+            columns, position = get_columnar_range(category, {}, None)
+
+        self.assertIsNone(position)
+        self.assertEqual(columns["timestamps"], [3, 2, 1])
+        self.assertEqual(columns["measures"]["code"], [3, 2, 1])
+
+    def test_columnar_requires_mode_all(self) -> None:
+        """
+        Ensure that the columnar format is rejected for other modes
+        """
+
+        response = self.client.get(
+            reverse("version-data", args=["oot", "us"]),
+            {"mode": "latest", "format": "columnar"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MeasureProjectionTests(SampleProjectMixin, APITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.add_entries(range(3))
+
+    def add_entries(self, timestamps: range) -> None:
+        self.post_entry_data(
+            [
+                {
+                    "categories": {
+                        "default": {"code": i, "code/total": 100, "data": i * 2},
+                    },
+                    "timestamp": i,
+                    "git_hash": f"hash{i}",
+                }
+                for i in timestamps
+            ]
+        )
+
+    def get_entries(self, mode: str, **params: str) -> list[dict[str, Any]]:
+        response = self.client.get(
+            reverse("category-data", args=["oot", "us", "default"]),
+            {"mode": mode, **params},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()["oot"]["us"]["default"]
+
+    def test_projection(self) -> None:
+        """
+        Ensure that only the requested measures are returned, in every mode that returns entries
+        """
+
+        expected = {"code": 2, "code/total": 100}
+
+        for params in [
+            {"mode": "latest"},
+            {"mode": "all"},
+            {"mode": "all", "limit": "1"},
+            {"mode": "all", "stream": "true"},
+        ]:
+            with self.subTest(params=params):
+                url = reverse("category-data", args=["oot", "us", "default"])
+                response = self.client.get(
+                    url, {**params, "measures": "code, code/total"}
+                )
+                if response.streaming:
+                    content = b"".join(response.streaming_content)  # type: ignore
+                else:
+                    content = response.content
+                entries = json.loads(content)["oot"]["us"]["default"]
+                self.assertEqual(entries[0]["measures"], expected)
+
+        response = self.client.get(
+            reverse("version-data", args=["oot", "us"]),
+            {"mode": "all", "format": "columnar", "measures": "data"},
+        )
+        columns = response.json()["oot"]["us"]["default"]
+        self.assertEqual(columns["measures"], {"data": [4, 2, 0]})
+
+        response = self.client.get(reverse("root-data"), {"measures": "data"})
+        self.assertEqual(
+            response.json()["oot"]["us"]["default"][0]["measures"], {"data": 4}
+        )
+
+    def test_projection_cache(self) -> None:
+        """
+        Ensure that projected and full histories are cached side by side, and both invalidated by new entries
+        """
+
+        full = self.get_entries("all")
+        projected = self.get_entries("all", measures="code")
+        self.assertEqual(len(full[0]["measures"]), 3)
+        self.assertEqual(projected[0]["measures"], {"code": 2})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_entries("all"), full)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_entries("all", measures="code"), projected)
+
+        self.add_entries(range(3, 5))
+
+        self.assertEqual(len(self.get_entries("all")), 5)
+        self.assertEqual(
+            self.get_entries("all", measures="code")[0]["measures"], {"code": 4}
+        )
+
+
+class ResponseCacheTests(SampleProjectMixin, APITestCase):
+    def get_shield(self, **params: str) -> dict[str, Any]:
+        response = self.client.get(
+            reverse("category-data", args=["oot", "us", "default"]),
+            {"mode": "shield", "measure": "code", **params},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_shield_cache(self) -> None:
+        """
+        Ensure that shields are cached per set of parameters and refreshed by new entries
+        """
+
+        self.post_entry(100, 10)
+
+        self.assertEqual(self.get_shield()["message"], "10.00%")
+        self.assertEqual(self.get_shield(color="red")["color"], "red")
+
+        # Only the change token is queried
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_shield()["color"], "informational")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_shield(color="red")["color"], "red")
+
+        self.post_entry(200, 50)
+
+        self.assertEqual(self.get_shield()["message"], "50.00%")
+        self.assertEqual(self.get_shield(color="red")["message"], "50.00%")
+
+    def test_stale_category_save(self) -> None:
+        """
+        Ensure that saving a category loaded before an upload doesn't take its generation back
+        """
+
+        self.post_entry(100, 10)
+        category = Category.objects.get(slug="default")
+        self.assertEqual(self.get_shield()["message"], "10.00%")
+
+        self.post_entry(200, 20)
+        category.name = "Renamed"
+        category.save()
+
+        self.assertEqual(Category.objects.get(slug="default").generation, 2)
+        self.assertEqual(self.get_shield()["message"], "20.00%")
+
+    def test_shield_cache_renames(self) -> None:
+        """
+        Ensure that the default shield label follows renames of the version and category
+        """
+
+        self.post_entry(100, 10)
+        self.assertEqual(self.get_shield()["label"], "US Default Code")
+
+        version = Version.objects.get(slug="us")
+        version.name = "EU"
+        version.save()
+        self.assertEqual(self.get_shield()["label"], "EU Default Code")
+
+    def test_shield_cache_size(self) -> None:
+        """
+        Ensure that caching shields with many different labels doesn't rewrite the others each time
+        """
+
+        self.post_entry(100, 10)
+        reset_stats()
+
+        for i in range(50):
+            self.get_shield(label=f"Label {i}")
+        # Another query parameter misses the response cache, but not the shield cache
+        for i in range(50):
+            shield = self.get_shield(label=f"Label {i}", style="flat")
+            self.assertEqual(shield["label"], f"Label {i}")
+
+        stats = get_stats()["shield"]
+        self.assertEqual(stats["sets"], 50)
+        self.assertEqual(stats["hits"], 50)
+        # Each set only writes its own payload
+        self.assertLess(stats["bytes"], 50 * 200)
+
+    def test_rendered_response_cache(self) -> None:
+        """
+        Ensure that rendered responses are served from the cache with their headers, until new entries arrive
+        """
+
+        self.post_entry(100, 10)
+        self.post_entry(200, 20)
+
+        url = reverse("version-data", args=["oot", "us"])
+        params = {"mode": "all", "limit": "1"}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Only the change token is queried
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, params)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached["Content-Type"], response["Content-Type"])
+        self.assertEqual(cached["Link"], response["Link"])
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+        self.post_entry(300, 30)
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.json()["oot"]["us"]["default"][0]["timestamp"], 300)
+
+    def test_browsable_api_not_cached(self) -> None:
+        """
+        Ensure that only JSON responses are cached, and not the browsable API's HTML
+        """
+
+        self.post_entry(100, 10)
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        with mock.patch("frog_api.conditional.set_response_cache") as set_cache:
+            html = self.client.get(url, HTTP_ACCEPT="text/html")
+            self.assertEqual(html["Content-Type"], "text/html; charset=utf-8")
+            set_cache.assert_not_called()
+
+            response = self.client.get(url, HTTP_ACCEPT="application/json")
+            self.assertEqual(response["Content-Type"], "application/json")
+            set_cache.assert_called_once()
+
+    def test_compressed_responses(self) -> None:
+        """
+        Ensure that cached responses are compressed once and served in the coding clients accept
+        """
+
+        for timestamp in range(10):
+            self.post_entry(timestamp, timestamp)
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        params = {"mode": "all"}
+        plain = self.client.get(url, params)
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        with mock.patch("frog_api.conditional.compress_body") as compress:
+            for _ in range(2):
+                compressed = self.client.get(
+                    url, params, HTTP_ACCEPT_ENCODING="br;q=0.5, gzip, deflate"
+                )
+                self.assertEqual(compressed["Content-Encoding"], "gzip")
+                self.assertEqual(gzip.decompress(compressed.content), plain.content)
+                self.assertEqual(compressed["ETag"], f"W/{plain['ETag']}")
+            compress.assert_not_called()
+
+        # The weakened ETag still matches
+        response = self.client.get(
+            url,
+            params,
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=compressed["ETag"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url, params, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertEqual(response.content, plain.content)
+
+    def test_choose_encoding(self) -> None:
+        """
+        Ensure that the preferred coding the client accepts is chosen
+        """
+
+        available = ("identity", "gzip", "br")
+        self.assertEqual(choose_encoding("", available), "identity")
+        self.assertEqual(choose_encoding("gzip, br", available), "br")
+        self.assertEqual(choose_encoding("gzip, br;q=0.5", available), "gzip")
+        self.assertEqual(choose_encoding("*", available), "br")
+        self.assertEqual(choose_encoding("br", ("identity", "gzip")), "identity")
+        self.assertEqual(choose_encoding("gzip;q=0, *", available), "br")
+
+    def test_structure_deletion_invalidates(self) -> None:
+        """
+        Ensure that deleting and recreating a category doesn't serve its old cached data
+        """
+
+        self.post_entry(100, 10)
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        self.assertEqual(len(self.client.get(url).json()["oot"]["us"]["default"]), 1)
+        self.assertIn("us", self.client.get(reverse("root-data")).json()["oot"])
+
+        structure_url = reverse("category-structure", args=["oot", "us", "default"])
+        response = self.client.delete(
+            structure_url, {"api_key": "test_key_123"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.post(
+            structure_url, {"api_key": "test_key_123", "name": "Default"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.client.get(url).json()["oot"]["us"]["default"], [])
+        self.assertEqual(self.client.get(reverse("root-data")).json()["oot"], {})
+
+
+class SlugCacheTests(SampleProjectMixin, APITestCase):
+    category_slugs = []
+
+    def get_category(self) -> Category:
+        return get_category("default", get_version("us", get_project("oot")))
+
+    def test_lookups_cached(self) -> None:
+        """
+        Ensure that slugs are resolved without queries once they have been looked up
+        """
+
+        with self.assertRaises(NonexistentCategoryException):
+            self.get_category()
+
+        response = self.client.post(
+            reverse("category-structure", args=["oot", "us", "default"]),
+            {"api_key": "test_key_123", "name": "Default"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        category = self.get_category()
+        self.assertEqual(category.name, "Default")
+
+        with self.assertNumQueries(0):
+            category = self.get_category()
+            self.assertEqual(category.version.project.auth_key, "test_key_123")
+
+    def test_admin_changes_invalidate(self) -> None:
+        """
+        Ensure that changes made outside of the API, like in the admin, are picked up
+        """
+
+        self.assertEqual(get_project("oot").auth_key, "test_key_123")
+
+        self.project.auth_key = "new_key_456"
+        self.project.save()
+
+        self.assertEqual(get_project("oot").auth_key, "new_key_456")
+
+        self.version.delete()
+
+        with self.assertRaises(NonexistentVersionException):
+            get_version("us", get_project("oot"))
+
+    def test_changes_from_other_workers(self) -> None:
+        """
+        Ensure that changes made through other workers are picked up within a bounded time, even when
+        the cache is private to each worker
+        """
+
+        with self.assertRaises(NonexistentCategoryException):
+            self.get_category()
+
+        # Created through another worker, whose invalidation doesn't reach this one
+        with mock.patch("frog_api.signals.bump_structure_generation"):
+            Category.objects.create(
+                slug="default", name="Default", version=self.version
+            )
+
+        with self.assertRaises(NonexistentCategoryException):
+            self.get_category()
+
+        later = LOCAL_STRUCTURE_GENERATION_TIMEOUT + STRUCTURE_GENERATION_TTL
+        with mock.patch("time.time", return_value=time.time() + later), mock.patch(
+            "time.monotonic", return_value=time.monotonic() + later
+        ):
+            self.assertEqual(self.get_category().name, "Default")
+
+
+class IncrementalCacheTests(SampleProjectMixin, APITestCase):
+    def category(self) -> Category:
+        return Category.objects.get(slug="default")
+
+    def cached_history(self) -> Optional[list[dict[str, Any]]]:
+        category = self.category()
+        return get_entries_cache(category.id, category.generation)
+
+    def history(self) -> list[dict[str, Any]]:
+        return read_entries(Entry.objects.order_by("-timestamp", "-id"))
+
+    def test_merge_on_ingest(self) -> None:
+        """
+        Ensure that new entries are merged into a cached history in order, instead of invalidating it
+        """
+
+        self.post_entries(100, 300)
+        self.client.get(
+            reverse("category-data", args=["oot", "us", "default"]), {"mode": "all"}
+        )
+        self.assertEqual(self.cached_history(), self.history())
+
+        self.post_entries(400, 200, 50)
+
+        self.assertEqual(self.cached_history(), self.history())
+        self.assertEqual(
+            [entry["timestamp"] for entry in self.history()], [400, 300, 200, 100, 50]
+        )
+
+    def test_stale_history_while_rebuilding(self) -> None:
+        """
+        Ensure that only one worker rebuilds an invalidated history, and that others get the previous one meanwhile
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+
+        self.post_entries(100)
+        self.client.get(url, {"mode": "all"})
+
+        # The cached history can't be merged with an entry at the same time
+        self.post_entries(100, git_hash="other")
+        category = self.category()
+
+        self.assertTrue(lock_entries_rebuild(category.id, category.generation))
+
+        response = self.client.get(url, {"mode": "all"})
+        self.assertEqual(len(response.json()["oot"]["us"]["default"]), 1)
+        # Stale responses aren't cached, or even tagged
+        self.assertFalse(response.has_header("ETag"))
+
+        unlock_entries_rebuild(category.id, category.generation)
+
+        response = self.client.get(url, {"mode": "all"})
+        self.assertEqual(len(response.json()["oot"]["us"]["default"]), 2)
+        self.assertTrue(response.has_header("ETag"))
+
+        # The lock was released after the rebuild
+        self.assertTrue(lock_entries_rebuild(category.id, category.generation))
+
+    def test_warm_cache(self) -> None:
+        """
+        Ensure that the warm_cache command fills the history, latest entry and digest caches
+        """
+
+        self.post_entries(100, 200)
+        cache.clear()
+
+        out = StringIO()
+        call_command("warm_cache", workers=1, stdout=out, stderr=StringIO())
+        self.assertIn("Warmed 1 of 1 categories", out.getvalue())
+
+        self.assertEqual(self.cached_history(), self.history())
+        category = self.category()
+        self.assertEqual(
+            get_latest_cache(category.id, category.generation), self.history()[0]
+        )
+        project_token = project_change_token("oot")
+        assert project_token is not None
+        self.assertIsNotNone(get_digest_cache(root_change_token()[0]))
+        self.assertIsNotNone(get_digest_cache(project_token[0], "oot"))
+
+    def test_unsafe_merge_invalidates(self) -> None:
+        """
+        Ensure that the cached history is dropped when new entries can't be merged safely
+        """
+
+        self.post_entries(100)
+        self.client.get(
+            reverse("category-data", args=["oot", "us", "default"]), {"mode": "all"}
+        )
+
+        # Entries at the same time as cached ones
+        self.post_entries(100, git_hash="other")
+        self.assertIsNone(self.cached_history())
+
+        # A history cached at an older generation
+        self.client.get(
+            reverse("category-data", args=["oot", "us", "default"]), {"mode": "all"}
+        )
+        Category.objects.update(generation=F("generation") + 1)
+        self.post_entries(200)
+        self.assertIsNone(self.cached_history())
+
+
+class CacheStatsTests(SampleProjectMixin, APITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        reset_stats()
+
+        entry = Entry(
+            category=self.categories["default"], timestamp=100, git_hash="hash"
+        )
+        entry.save()
+        Measure(entry=entry, type="code", value=1).save()
+
+    @mock.patch("frog_api.views.common.ULTIMATE_API_KEY", "ultimate")
+    def test_cache_stats(self) -> None:
+        """
+        Ensure that cache hits, misses and rebuilds are counted, and only shown with the ultimate key
+        """
+
+        get_all_entries("oot", "us", "default")
+        get_all_entries("oot", "us", "default")
+
+        url = reverse("cache-stats")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(url, headers={"X-API-Key": "test_key_123"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # Keys in the query string would end up in access logs
+        response = self.client.get(url, {"api_key": "ultimate"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(url, headers={"X-API-Key": "ultimate"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entries = response.json()["entries"]
+        self.assertEqual(entries["hits"], 1)
+        self.assertEqual(entries["misses"], 1)
+        self.assertEqual(entries["sets"], 1)
+        self.assertGreater(entries["bytes"], 0)
+        self.assertEqual(entries["rebuilds"]["count"], 1)
+        self.assertEqual(sum(entries["rebuilds"]["buckets_ms"].values()), 1)
+
+        response = self.client.delete(url, headers={"X-API-Key": "ultimate"})
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(get_stats()["entries"]["hits"], 0)
+
+    def test_estimate_size(self) -> None:
+        """
+        Ensure that the sizes of long histories are estimated closely without pickling them whole
+        """
+
+        entry = get_all_entries("oot", "us", "default")[0]
+        history = [
+            {**entry, "timestamp": i, "measures": {"code": i}} for i in range(1000)
+        ]
+        actual = len(pickle.dumps(history, pickle.HIGHEST_PROTOCOL))
+
+        with mock.patch("frog_api.stats.pickle.dumps", wraps=pickle.dumps) as dumps:
+            estimate = estimate_size(history)
+        self.assertLess(len(dumps.call_args.args[0]), len(history))
+        self.assertAlmostEqual(estimate / actual, 1, delta=0.2)
+
+
+class CacheRaceTests(SampleProjectMixin, APITransactionTestCase):
+    def history(self) -> list[dict[str, Any]]:
+        return read_entries(Entry.objects.order_by("-timestamp", "-id"))
+
+    def thread(
+        self, target: Callable[[], Any], errors: list[BaseException]
+    ) -> threading.Thread:
+        def run() -> None:
+            try:
+                target()
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        return threading.Thread(target=run)
+
+    def test_stale_write_after_ingest(self) -> None:
+        """
+        Ensure that a history read before new entries arrive, but cached after, is never served
+        """
+
+        self.post_entries(100)
+
+        read_done = threading.Event()
+        resume = threading.Event()
+
+        def read_and_wait(*args: Any) -> list[dict[str, Any]]:
+            data = read_entries(*args)
+            read_done.set()
+            resume.wait(10)
+            return data
+
+        errors: list[BaseException] = []
+        reader = self.thread(lambda: get_all_entries("oot", "us", "default"), errors)
+        with mock.patch("frog_api.views.data.read_entries", read_and_wait):
+            reader.start()
+            self.assertTrue(read_done.wait(10))
+            self.post_entries(200)
+            resume.set()
+            reader.join()
+        self.assertEqual(errors, [])
+
+        # The reader's history landed under the previous generation
+        category = Category.objects.get(slug="default")
+        stale = get_entries_cache(category.id, category.generation - 1)
+        self.assertEqual(len(stale or []), 1)
+
+        self.assertEqual(get_all_entries("oot", "us", "default"), self.history())
+        self.assertEqual(len(self.history()), 2)
+
+    def test_concurrent_ingest_and_reads(self) -> None:
+        """
+        Ensure that the cached history matches the database after concurrent uploads and reads
+        """
+
+        errors: list[BaseException] = []
+        threads = []
+        for i in range(20):
+            client = APIClient()
+            # Every other upload ties with the previous one, so can't be merged
+            timestamp = 100 + i - i % 2
+            post = partial(
+                self.post_entries, timestamp, git_hash=f"hash{i}_", client=client
+            )
+            threads.append(self.thread(post, errors))
+            threads += [
+                self.thread(lambda: get_all_entries("oot", "us", "default"), errors)
+                for _ in range(4)
+            ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        self.assertEqual(get_all_entries("oot", "us", "default"), self.history())
+        self.assertEqual(len(self.history()), 20)
+
+
+class WarmCachePoolTests(SampleProjectMixin, APITransactionTestCase):
+    category_slugs = ["default", "actors"]
+
+    def test_warm_cache_in_pool(self) -> None:
+        """
+        Ensure that warm_cache warms categories in worker processes, and can still query the database itself
+        afterwards
+        """
+
+        out = StringIO()
+        call_command("warm_cache", workers=2, stdout=out, stderr=StringIO())
+
+        self.assertIn("Warmed 2 of 2 categories and 1 project digests", out.getvalue())
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_warm_cache_pool_timeout(self) -> None:
+        """
+        Ensure that warm_cache stops categories still being warmed in worker processes once its timeout runs out
+        """
+
+        out = StringIO()
+        start = time.monotonic()
+        with mock.patch(
+            "frog_api.management.commands.warm_cache.get_all_entries",
+            side_effect=lambda *slugs: time.sleep(60),
+        ):
+            call_command(
+                "warm_cache", workers=2, timeout=0.5, stdout=out, stderr=StringIO()
+            )
+
+        self.assertLess(time.monotonic() - start, 30)
+        self.assertEqual(multiprocessing.active_children(), [])
+        self.assertIn("Warmed 0 of 2 categories and 0 project digests", out.getvalue())
+
+
+class ReaderTests(APITestCase):
+    def test_read_entries_matches_serializer(self) -> None:
+        """
+        Ensure that the fast reader produces the same data as EntrySerializer
+        """
+
+        project = Project(slug="oot", name="Ocarina of Time")
+        project.save()
+        version = Version(slug="us", name="US", project=project)
+        version.save()
+        category = Category(slug="default", name="Default", version=version)
+        category.save()
+
+        for timestamp in range(5):
+            entry = Entry(
+                category=category,
+                timestamp=timestamp,
+                git_hash=str(timestamp),
+                description=f"entry {timestamp}",
+            )
+            entry.save()
+            for i in range(timestamp):
+                Measure(entry=entry, type=f"measure_{i}", value=i).save()
+
+        entries = Entry.objects.filter(category=category).order_by("-timestamp", "-id")
+
+        with self.assertNumQueries(2):
+            data = read_entries(entries)
+
+        serialized = EntrySerializer(entries.prefetch_related("measures"), many=True)
+        self.assertEqual(data, serialized.data)
+
+
+class ConditionalRequestTests(SampleProjectMixin, APITestCase):
+    category_slugs = ["default", "actors"]
+
+    def test_not_modified(self) -> None:
+        """
+        Ensure that every data endpoint answers 304 until new entries are added
+        """
+
+        self.post_entry(1, 1)
+
+        # Each URL with the number of queries needed to compute its change token
+        urls = {
+            reverse("root-data"): 3,
+            reverse("project-data", args=["oot"]): 2,
+            reverse("version-data", args=["oot", "us"]) + "?mode=all": 1,
+            reverse("category-data", args=["oot", "us", "default"]): 1,
+            reverse("category-data", args=["oot", "us", "actors"]): 1,
+        }
+        etags = {}
+        for url, num_queries in urls.items():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn("Last-Modified", response)
+            etags[url] = response["ETag"]
+
+            with self.assertNumQueries(num_queries):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.post_entry(2, 2)
+
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            if url.endswith("actors/"):
+                # Other categories are unaffected
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            else:
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotEqual(response["ETag"], etags[url])
+
+    def test_changes_outside_uploads(self) -> None:
+        """
+        Ensure that entries and measures changed or deleted through the ORM change the ETag
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        self.post_entry(1, 1)
+        self.post_entry(2, 2)
+
+        def changed(etag: str) -> str:
+            response = self.client.get(url, {"mode": "all"}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response["ETag"]
+
+        etag = self.client.get(url, {"mode": "all"})["ETag"]
+
+        measure = Measure.objects.get(entry__timestamp=2, type="code")
+        measure.value = 20
+        measure.save()
+        etag = changed(etag)
+
+        Measure.objects.filter(entry__timestamp=2).delete()
+        etag = changed(etag)
+
+        Entry.objects.get(timestamp=2).delete()
+        etag = changed(etag)
+
+        response = self.client.get(url, {"mode": "all"})
+        self.assertEqual(
+            [entry["timestamp"] for entry in response.json()["oot"]["us"]["default"]],
+            [1],
+        )
+
+        # Deleting a category takes its entries with it, without touching the other categories
+        generation = Category.objects.get(slug="actors").generation
+        Category.objects.get(slug="default").delete()
+        self.assertEqual(Category.objects.get(slug="actors").generation, generation)
+
+    def test_etag_depends_on_query(self) -> None:
+        """
+        Ensure that different modes of the same endpoint don't share an ETag
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        self.post_entry(1, 1)
+
+        latest = self.client.get(url)
+        all = self.client.get(url, {"mode": "all"}, HTTP_IF_NONE_MATCH=latest["ETag"])
+
+        self.assertEqual(all.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(all["ETag"], latest["ETag"])
+
+    def test_if_modified_since(self) -> None:
+        """
+        Ensure that If-Modified-Since is honored
+        """
+
+        url = reverse("category-data", args=["oot", "us", "default"])
+        self.post_entry(1, 1)
+
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@skipUnless(connection.vendor == "sqlite", "Query plans are checked on SQLite")
+class QueryPlanTests(APITestCase):
+    def setUp(self) -> None:
+        project = Project(slug="oot", name="Ocarina of Time")
+        project.save()
+        version = Version(slug="us", name="US", project=project)
+        version.save()
+        self.category = Category(slug="default", name="Default", version=version)
+        self.category.save()
+
+        entry = Entry(category=self.category, timestamp=1, git_hash="abc")
+        entry.save()
+        Measure(entry=entry, type="code", value=1).save()
+
+    def test_history_uses_index(self) -> None:
+        """
+        Ensure that reading a category's history, newest first, is served by an index without sorting
+        """
+
+        entries = Entry.objects.filter(category=self.category).order_by(
+            "-timestamp", "-id"
+        )
+
+        for queryset in [entries, entries[:10], entries.filter(timestamp__lt=5)]:
+            plan = queryset.explain()
+            self.assertIn("USING INDEX entry_category_timestamp", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_measures_use_index(self) -> None:
+        """
+        Ensure that measures are looked up by entry, and by entry and type, through an index
+        """
+
+        plan = Measure.objects.filter(entry_id__in=[1, 2, 3]).explain()
+        self.assertIn("USING INDEX measure_entry_type (entry_id=?)", plan)
+
+        plan = Measure.objects.filter(entry_id=1, type="code").explain()
+        self.assertIn("USING INDEX measure_entry_type (entry_id=? AND type=?)", plan)
@@ -1,5 +1,5 @@
 from django.urls import path, re_path
-from frog_api.views import data, structure
+from frog_api.views import data, jobs, stats, structure
 
 urlpatterns = [
     # structure (/project)
@@ -44,4 +44,16 @@ urlpatterns = [
         data.RootDataView.as_view(),
         name="root-data",
     ),
+    # jobs (/jobs)
+    path(
+        "jobs/<int:job_id>/",
+        jobs.IngestJobView.as_view(),
+        name="ingest-job",
+    ),
+    # stats (/stats)
+    path(
+        "stats/cache/",
+        stats.CacheStatsView.as_view(),
+        name="cache-stats",
+    ),
 ]
@@ -1,31 +1,107 @@
+from functools import lru_cache
+from typing import Any, Iterable, Optional, TypeVar
+
+from django.db import DEFAULT_DB_ALIAS, models
+
+from frog_api.cache import get_structure_generation
 from frog_api.exceptions import (
     InvalidAPIKeyException,
+    MissingAPIKeyException,
     NonexistentCategoryException,
     NonexistentProjectException,
     NonexistentVersionException,
 )
 from frog_api.models import Category, Project, Version
 from frogress.settings import ULTIMATE_API_KEY
+from rest_framework.request import Request
+
+
+ModelT = TypeVar("ModelT", bound=models.Model)
+
+# Requests without a body send API keys in this header, as query strings end up in access logs
+API_KEY_HEADER = "X-API-Key"
+
+# Number of slug lookups remembered by each worker
+SLUG_CACHE_SIZE = 4096
+
+PROJECT_FIELDS = ("id", "slug", "name", "auth_key")
+VERSION_FIELDS = ("id", "project_id", "slug", "name")
+CATEGORY_FIELDS = ("id", "version_id", "slug", "name")
+
+RowT = Optional[tuple[Any, ...]]
+
+
+# The structure generation is only part of the key, so that bumping it makes every lookup miss
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def _find_project(slug: str, generation: int) -> RowT:
+    return Project.objects.filter(slug=slug).values_list(*PROJECT_FIELDS).first()
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def _find_version(slug: str, project_id: int, generation: int) -> RowT:
+    return (
+        Version.objects.filter(slug=slug, project_id=project_id)
+        .values_list(*VERSION_FIELDS)
+        .first()
+    )
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def _find_category(slug: str, version_id: int, generation: int) -> RowT:
+    return (
+        Category.objects.filter(slug=slug, version_id=version_id)
+        .values_list(*CATEGORY_FIELDS)
+        .first()
+    )
+
+
+def _from_row(
+    model: type[ModelT], fields: tuple[str, ...], row: tuple[Any, ...]
+) -> ModelT:
+    # Fields that weren't looked up are deferred, and loaded if they're ever accessed
+    values = dict(zip(fields, row))
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in values]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
 
 
 def get_project(slug: str) -> Project:
-    ret = Project.objects.filter(slug=slug).first()
-    if not ret:
+    row = _find_project(slug, get_structure_generation())
+    if not row:
         raise NonexistentProjectException(slug)
-    return ret
+    return _from_row(Project, PROJECT_FIELDS, row)
 
 
 def get_version(slug: str, project: Project) -> Version:
-    ret = Version.objects.filter(slug=slug, project=project).first()
-    if not ret:
+    row = _find_version(slug, project.id, get_structure_generation())
+    if not row:
         raise NonexistentVersionException(project.slug, slug)
+    ret = _from_row(Version, VERSION_FIELDS, row)
+    ret.project = project
     return ret
 
 
 def get_category(slug: str, version: Version) -> Category:
-    ret = Category.objects.filter(slug=slug, version=version).first()
-    if not ret:
+    row = _find_category(slug, version.id, get_structure_generation())
+    if not row:
         raise NonexistentCategoryException(version.project.slug, version.slug, slug)
+    ret = _from_row(Category, CATEGORY_FIELDS, row)
+    ret.version = version
+    return ret
+
+
+def get_categories(slugs: Iterable[str], version: Version) -> dict[str, Category]:
+    """
+    Looks up several categories of a version at once, keyed by slug. Missing ones are left out.
+    """
+    rows = Category.objects.filter(version=version, slug__in=set(slugs)).values_list(
+        *CATEGORY_FIELDS
+    )
+
+    ret = {}
+    for row in rows:
+        category = _from_row(Category, CATEGORY_FIELDS, row)
+        category.version = version
+        ret[category.slug] = category
     return ret
 
 
@@ -36,6 +112,19 @@ def validate_ultimate_api_key(key: str) -> bool:
         raise InvalidAPIKeyException()
 
 
+def get_header_api_key(request: Request) -> Optional[str]:
+    return request.headers.get(API_KEY_HEADER)
+
+
+def validate_staff_or_ultimate_api_key(request: Request) -> bool:
+    if request.user.is_staff:
+        return True
+    key = get_header_api_key(request)
+    if not key:
+        raise MissingAPIKeyException()
+    return validate_ultimate_api_key(key)
+
+
 def validate_api_key(key: str, project: Project) -> bool:
     if key == ULTIMATE_API_KEY or key == project.auth_key:
         return True
@@ -1,102 +1,519 @@
 from enum import Enum
-from typing import Any, Optional
+from itertools import islice
+from typing import IO, Any, Callable, Iterable, Optional
 
-from django.db import IntegrityError, models, transaction
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.http.response import HttpResponseBase
 from django.template.defaultfilters import title
+from django.urls import reverse
 from rest_framework import status
+from rest_framework.exceptions import APIException
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from frog_api.cache import (
+    get_digest_cache,
+    get_downsample_cache,
     get_entries_cache,
-    invalidate_entries_cache,
+    get_latest_cache,
+    get_shield_cache,
+    lock_entries_rebuild,
+    set_digest_cache,
+    set_downsample_cache,
     set_entries_cache,
+    set_latest_cache,
+    set_shield_cache,
+    unlock_entries_rebuild,
 )
+from frog_api.conditional import (
+    category_change_token,
+    conditional,
+    project_change_token,
+    root_change_token,
+    version_change_token,
+)
+from frog_api.downsample import largest_triangle_three_buckets
 from frog_api.exceptions import (
     InvalidDataException,
     EmptyCategoryException,
-    NonexistentCategoryException,
+    LengthRequiredException,
     NonexistentProjectException,
-    NonexistentVersionException,
+    PartialUploadException,
+)
+from frog_api.ingest import (
+    OnConflict,
+    get_upload_version,
+    validate_uploaded_entries,
+    write_entries,
+)
+from frog_api.latest import (
+    get_latest_entries_data,
+    get_latest_entry_data,
+    latest_entries_queryset,
+)
+from frog_api.models import Category, Entry, IngestJob, Measure, Project, Version
+from frog_api.renderers import ColumnarJSONRenderer
+from frog_api.readers import (
+    EntryT,
+    MeasureTypesT,
+    project_measures,
+    read_entries,
+    read_entries_keyed,
+    read_entry_measures,
+)
+from frog_api.stats import timed_rebuild
+from frog_api.streaming import NDJSON_MEDIA_TYPE, iter_ndjson, stream_all_entries
+from frog_api.serializers.request_serializers import (
+    CreateEntriesSerializer,
+    CursorT,
+    DownsampleSerializer,
+    EntriesRangeSerializer,
+    QueueEntriesSerializer,
+    UploadHeaderSerializer,
+    encode_cursor,
 )
-from frog_api.models import Category, Entry, Measure, Project, Version
-from frog_api.serializers.model_serializers import EntrySerializer
-from frog_api.serializers.request_serializers import CreateEntriesSerializer
 from frog_api.views.common import (
     get_category,
     get_project,
     get_version,
-    validate_api_key,
 )
 
-EntryT = dict[str, Any]
+ColumnsT = dict[str, Any]
 
+DOWNSAMPLE_CHUNK_SIZE = 2000
 
-def get_latest_entry(
+# The query parameters a shield depends on
+SHIELD_PARAMS = ("measure", "total", "label", "color")
+
+
+def get_current_category(
     project_slug: str, version_slug: str, category_slug: str
-) -> Optional[EntryT]:
+) -> Category:
+    """
+    Looks up a category along with its current generation.
+    The generation has to be read before any of the category's data, so that the data is never cached
+    under a generation newer than the one it was read at.
+    """
     project = get_project(project_slug)
     version = get_version(version_slug, project)
     category = get_category(category_slug, version)
+    category.refresh_from_db(fields=["generation"])
+    return category
 
-    entry = Entry.objects.filter(category=category).first()
 
-    if entry is None:
-        return None
+def get_category_latest_entry(
+    category: Category, measure_types: MeasureTypesT = None
+) -> Optional[EntryT]:
+    latest = get_latest_cache(category.id, category.generation)
+    if latest is None:
+        with timed_rebuild("latest"):
+            latest = get_latest_entry_data(category.id)
+        if latest is None:
+            return None
+        set_latest_cache(category.id, category.generation, latest)
 
-    return EntrySerializer(entry).data
+    return project_measures(latest, measure_types)
+
+
+def get_latest_entry(
+    project_slug: str,
+    version_slug: str,
+    category_slug: str,
+    measure_types: MeasureTypesT = None,
+) -> Optional[EntryT]:
+    category = get_current_category(project_slug, version_slug, category_slug)
+    return get_category_latest_entry(category, measure_types)
+
+
+def get_category_entries(
+    category: Category, measure_types: MeasureTypesT = None
+) -> list[EntryT]:
+    data = get_entries_cache(category.id, category.generation, measure_types)
+    if data is not None:
+        return data
+
+    locked = lock_entries_rebuild(category.id, category.generation, measure_types)
+    if not locked:
+        # Another worker is already rebuilding the history, so serve the previous one meanwhile
+        stale = get_entries_cache(
+            category.id, category.generation, measure_types, stale=True
+        )
+        if stale is not None:
+            return stale
+
+    try:
+        with timed_rebuild("entries"):
+            data = read_entries(
+                Entry.objects.filter(category=category).order_by("-timestamp", "-id"),
+                measure_types,
+            )
+        set_entries_cache(category.id, category.generation, data, measure_types)
+    finally:
+        if locked:
+            unlock_entries_rebuild(category.id, category.generation, measure_types)
+
+    return data
 
 
 def get_all_entries(
-    project_slug: str, version_slug: str, category_slug: str
+    project_slug: str,
+    version_slug: str,
+    category_slug: str,
+    measure_types: MeasureTypesT = None,
+) -> list[EntryT]:
+    category = get_current_category(project_slug, version_slug, category_slug)
+    return get_category_entries(category, measure_types)
+
+
+def get_category_downsampled_entries(
+    category: Category, measure: str, points: int
 ) -> list[EntryT]:
-    data = get_entries_cache(project_slug, version_slug, category_slug)
+    """
+    Returns at most `points` entries of a category, chosen to preserve the shape of the given measure's
+    series. Entries only carry that measure and are ordered newest first, like the full history.
+    """
+    data = get_downsample_cache(category.id, category.generation, measure, points)
+    if data is not None:
+        return data
+
+    rows = (
+        Measure.objects.filter(entry__category=category, type=measure)
+        .order_by("entry__timestamp", "entry__id")
+        .values_list(
+            "entry__timestamp", "value", "entry__git_hash", "entry__description"
+        )
+    )
+
+    with timed_rebuild("downsample"), transaction.atomic():
+        count = rows.count()
+        sampled = largest_triangle_three_buckets(
+            rows.iterator(chunk_size=DOWNSAMPLE_CHUNK_SIZE), count, points
+        )
+
+    data = [
+        {
+            "timestamp": timestamp,
+            "git_hash": git_hash,
+            "measures": {measure: value},
+            "description": description,
+        }
+        for timestamp, value, git_hash, description in reversed(sampled)
+    ]
+    # Any measure can be asked for, so don't fill the cache with the empty series of ones that don't exist
     if data:
-        return data  # type: ignore
+        set_downsample_cache(category.id, category.generation, measure, points, data)
+    return data
 
-    project = get_project(project_slug)
-    version = get_version(version_slug, project)
-    category = get_category(category_slug, version)
 
-    entries = Entry.objects.filter(category=category).prefetch_related("measures")
+def get_downsampled_entries(
+    project_slug: str,
+    version_slug: str,
+    category_slug: str,
+    measure: str,
+    points: int,
+) -> list[EntryT]:
+    category = get_current_category(project_slug, version_slug, category_slug)
+    return get_category_downsampled_entries(category, measure, points)
+
+
+def parse_downsample(request: Request) -> tuple[str, int]:
+    request_ser = DownsampleSerializer(data=request.query_params)
+    request_ser.is_valid(raise_exception=True)
+    return request_ser.validated_data["measure"], request_ser.validated_data["points"]
+
+
+def parse_measure_types(request: Request) -> MeasureTypesT:
+    """
+    Returns the measure types a request asks for with `measures=a,b,c`, or None if it wants all of them.
+    """
+    if "measures" not in request.query_params:
+        return None
+
+    measures = request.query_params["measures"].split(",")
+    return sorted({measure.strip() for measure in measures if measure.strip()})
+
+
+def parse_entries_range(request: Request) -> Optional[dict[str, Any]]:
+    """
+    Returns the validated range parameters of a request, or None if it asks for the full history.
+    """
+    if not any(
+        param in request.query_params for param in ("since", "until", "limit", "cursor")
+    ):
+        return None
+
+    request_ser = EntriesRangeSerializer(data=request.query_params)
+    request_ser.is_valid(raise_exception=True)
+    return request_ser.validated_data
+
+
+def entries_range_queryset(
+    category: Category, entries_range: dict[str, Any], after: Optional[tuple[int, int]]
+) -> QuerySet[Entry]:
+    """
+    Returns the entries of a category within a time range, newest first, starting after the
+    given (timestamp, id) position.
+    """
+    entries = Entry.objects.filter(category=category)
+
+    if "since" in entries_range:
+        entries = entries.filter(timestamp__gte=entries_range["since"])
+    if "until" in entries_range:
+        entries = entries.filter(timestamp__lte=entries_range["until"])
+    if after is not None:
+        timestamp, id = after
+        entries = entries.filter(
+            Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=id)
+        )
+
+    return entries.order_by("-timestamp", "-id")
+
+
+def get_entries_range(
+    category: Category,
+    entries_range: dict[str, Any],
+    after: Optional[tuple[int, int]],
+    measure_types: MeasureTypesT = None,
+) -> tuple[list[EntryT], Optional[tuple[int, int]]]:
+    """
+    Returns a page of entries of a category, along with the position to continue from, if there are more.
+    """
+    entries = entries_range_queryset(category, entries_range, after)
+
+    limit = entries_range.get("limit")
+    if limit is None:
+        return read_entries(entries, measure_types), None
+
+    page = read_entries_keyed(entries[: limit + 1], "id", measure_types)
+    position = None
+    if len(page) > limit:
+        page = page[:limit]
+        id, entry = page[-1]
+        position = (entry["timestamp"], id)
+
+    return [entry for _, entry in page], position
+
+
+def get_columnar_range(
+    category: Category,
+    entries_range: dict[str, Any],
+    after: Optional[tuple[int, int]],
+    measure_types: MeasureTypesT = None,
+) -> tuple[ColumnsT, Optional[tuple[int, int]]]:
+    """
+    Returns a page of entries of a category as parallel arrays, along with the position to continue
+    from, if there are more. Measures missing from an entry are null.
+    """
+    entries = entries_range_queryset(category, entries_range, after)
+    rows = entries.values_list("id", "timestamp", "git_hash")
+
+    limit = entries_range.get("limit")
+    position = None
+    if limit is not None:
+        page = list(rows[: limit + 1])
+        if len(page) > limit:
+            page = page[:limit]
+            position = (page[-1][1], page[-1][0])
+    else:
+        page = list(rows)
+
+    entry_measures = read_entry_measures([id for id, _, _ in page], measure_types)
+    measures: dict[str, list[Optional[int]]] = {}
+    for i, (id, _, _) in enumerate(page):
+        for type, value in entry_measures.get(id, {}).items():
+            if type not in measures:
+                measures[type] = [None] * len(page)
+            measures[type][i] = value
+
+    columns = {
+        "timestamps": [timestamp for _, timestamp, _ in page],
+        "git_hashes": [git_hash for _, _, git_hash in page],
+        "measures": measures,
+    }
+    return columns, position
+
+
+def empty_columns() -> ColumnsT:
+    return {"timestamps": [], "git_hashes": [], "measures": {}}
+
+
+def get_categories_range(
+    categories: Iterable[Category],
+    entries_range: dict[str, Any],
+    read: Callable[
+        [Category, dict[str, Any], Optional[tuple[int, int]], MeasureTypesT],
+        tuple[Any, Optional[tuple[int, int]]],
+    ] = get_entries_range,
+    empty: Callable[[], Any] = list,
+    measure_types: MeasureTypesT = None,
+) -> tuple[dict[str, Any], Optional[str]]:
+    """
+    Reads a range of entries for each of the given categories, keyed by category slug,
+    along with the cursor for the next page, if there is one.
+    """
+    cursor: Optional[CursorT] = entries_range.get("cursor")
+
+    categories_data: dict[str, Any] = {}
+    positions: CursorT = {}
+    for category in categories:
+        if cursor is not None and category.slug not in cursor:
+            # This category was exhausted on a previous page
+            categories_data[category.slug] = empty()
+            continue
+
+        after = cursor[category.slug] if cursor is not None else None
+        entries, position = read(category, entries_range, after, measure_types)
+        categories_data[category.slug] = entries
+        if position is not None:
+            positions[category.slug] = position
+
+    return categories_data, encode_cursor(positions) if positions else None
+
+
+def paginated_response(
+    request: Request, response_json: dict[str, Any], next_cursor: Optional[str]
+) -> Response:
+    response = Response(response_json)
+
+    if next_cursor is not None:
+        params = request.query_params.copy()
+        params["cursor"] = next_cursor
+        url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+        response["Link"] = f'<{url}>; rel="next"'
+
+    return response
+
+
+def wants_columnar(request: Request) -> bool:
+    return request.accepted_renderer.format == ColumnarJSONRenderer.format
+
+
+def wants_stream(request: Request) -> bool:
+    return request.query_params.get("stream", "").lower() in ("1", "true")
+
 
-    data = EntrySerializer(entries, many=True).data
-    set_entries_cache(project_slug, version_slug, category_slug, data)
-    return data  # type: ignore
+def is_ndjson(request: Request) -> bool:
+    return request.content_type.split(";")[0].strip().lower() == NDJSON_MEDIA_TYPE
+
+
+def wants_async(request: Request) -> bool:
+    return request.query_params.get("async", "").lower() in ("1", "true")
+
+
+def get_latest_entries(
+    category_ids: list[int], measure_types: MeasureTypesT = None
+) -> dict[int, EntryT]:
+    """
+    Returns the most recent entry of each of the given categories, keyed by category id.
+    Categories without any entries are left out.
+    """
+    entries = latest_entries_queryset(category_ids)
+
+    return dict(read_entries_keyed(entries, "category_id", measure_types))
+
+
+def get_versions_digest(
+    projects: QuerySet[Project],
+) -> dict[str, dict[str, dict[str, list[EntryT]]]]:
+    """
+    Returns the most recent entry of each category of each version of the given projects.
+    Versions without any entries are left out.
+    """
+    digest: dict[str, dict[str, dict[str, list[EntryT]]]] = {
+        slug: {} for slug in projects.order_by("id").values_list("slug", flat=True)
+    }
+
+    categories = list(
+        Category.objects.filter(version__project__in=projects)
+        .select_related("version__project")
+        .order_by("version_id", "id")
+    )
+    latest = get_latest_entries([category.id for category in categories])
+
+    for category in categories:
+        entry = latest.get(category.id)
+        if entry is None:
+            continue
+
+        version = category.version
+        versions = digest[version.project.slug]
+        versions.setdefault(version.slug, {})[category.slug] = [entry]
+
+    return digest
 
 
 def get_versions_digest_for_project(project: Project) -> dict[Any, Any]:
-    versions = {}
-    for version in Version.objects.filter(project=project):
-        category_entries: dict[str, list[EntryT]] = {}
+    projects = Project.objects.filter(id=project.id)
+    return get_versions_digest(projects)[project.slug]
+
+
+def get_root_digest() -> dict[str, dict[str, dict[str, list[EntryT]]]]:
+    # Read before the digest, so that changes made while it is built change the key it's cached under
+    token, _ = root_change_token()
+    projects = get_digest_cache(token)
+    if projects is None:
+        with timed_rebuild("digest"):
+            projects = get_versions_digest(Project.objects.all())
+        set_digest_cache(token, projects)
+    return projects
 
-        for category in Category.objects.filter(version=version):
-            entry = get_latest_entry(project.slug, version.slug, category.slug)
-            if entry is not None:
-                category_entries[category.slug] = [entry]
 
-        if len(category_entries) > 0:
-            versions[version.slug] = category_entries
+def get_project_digest(project_slug: str) -> dict[str, dict[str, list[EntryT]]]:
+    change_token = project_change_token(project_slug)
+    if change_token is None:
+        raise NonexistentProjectException(project_slug)
 
+    token, _ = change_token
+    versions = get_digest_cache(token, project_slug)
+    if versions is None:
+        project = get_project(project_slug)
+        with timed_rebuild("digest"):
+            versions = get_versions_digest_for_project(project)
+        set_digest_cache(token, versions, project_slug)
     return versions
 
 
+def project_versions_digest(
+    versions: dict[str, dict[str, list[EntryT]]], measure_types: MeasureTypesT
+) -> dict[str, dict[str, list[EntryT]]]:
+    """
+    Returns a copy of the digest of a project's versions that only has the given measures.
+    """
+    if measure_types is None:
+        return versions
+
+    return {
+        version_slug: {
+            category_slug: [project_measures(entry, measure_types) for entry in entries]
+            for category_slug, entries in categories.items()
+        }
+        for version_slug, categories in versions.items()
+    }
+
+
 class RootDataView(APIView):
     """
     API endpoint that returns the most recent entry for overall progress of each version of each project.
     """
 
+    @conditional(root_change_token)
     def get(self, request: Request) -> Response:
         """
         Return the most recent entry for overall progress of each version of each project.
         """
 
-        projects = {}
-        for project in Project.objects.all():
-            projects[project.slug] = get_versions_digest_for_project(project)
+        projects = get_root_digest()
 
-        return Response(projects)
+        measure_types = parse_measure_types(request)
+        return Response(
+            {
+                project_slug: project_versions_digest(versions, measure_types)
+                for project_slug, versions in projects.items()
+            }
+        )
 
 
 class ProjectDataView(APIView):
@@ -104,31 +521,43 @@ class ProjectDataView(APIView):
     API endpoint that returns the most recent entry for each version of a project.
     """
 
+    @conditional(project_change_token)
     def get(self, request: Request, project_slug: str) -> Response:
         """
         Return the most recent entry for overall progress for each version of a project.
         """
 
-        project = get_project(project_slug)
-        versions = get_versions_digest_for_project(project)
+        versions = get_project_digest(project_slug)
 
-        return Response({project_slug: versions})
+        measure_types = parse_measure_types(request)
+        return Response(
+            {project_slug: project_versions_digest(versions, measure_types)}
+        )
 
 
 def get_progress_shield(
     request: Request, project_slug: str, version_slug: str, category_slug: str
 ) -> dict[str, Any]:
-    latest = get_latest_entry(project_slug, version_slug, category_slug)
+    category = get_current_category(project_slug, version_slug, category_slug)
+    version = category.version
+
+    # The default label is made of the names, which can change without the generation changing
+    shield_params = (
+        version.name,
+        category.name,
+        *(request.query_params.get(param) for param in SHIELD_PARAMS),
+    )
+    shield = get_shield_cache(category.id, category.generation, shield_params)
+    if shield is not None:
+        return shield
+
+    latest = get_category_latest_entry(category)
 
     if latest is None:
         raise EmptyCategoryException(project_slug, version_slug, category_slug)
 
     latest_measures = latest["measures"]
 
-    project = get_project(project_slug)
-    version = get_version(version_slug, project)
-    category = get_category(category_slug, version)
-
     params = request.query_params
     if not params:
         raise InvalidDataException("No measure specified")
@@ -167,13 +596,16 @@ def get_progress_shield(
 
     color = params.get("color", "informational" if fraction < 1.0 else "success")
 
-    return {"schemaVersion": 1, "label": label, "message": message, "color": color}
+    shield = {"schemaVersion": 1, "label": label, "message": message, "color": color}
+    set_shield_cache(category.id, category.generation, shield_params, shield)
+    return shield
 
 
 class Mode(Enum):
     LATEST = "latest"
     ALL = "all"
     SHIELD = "shield"
+    DOWNSAMPLE = "downsample"
 
 
 class VersionDataView(APIView):
@@ -181,61 +613,94 @@ class VersionDataView(APIView):
     API endpoint that returns data for overall progress for a version of a project.
     """
 
+    renderer_classes = [*APIView.renderer_classes, ColumnarJSONRenderer]
+
     @staticmethod
     def create_entries(
-        req_data: dict[str, Any], project_slug: str, version_slug: str
-    ) -> int:
+        req_data: Any,
+        project_slug: str,
+        version_slug: str,
+        on_conflict: OnConflict = OnConflict.ERROR,
+    ) -> dict[str, int]:
         request_ser = CreateEntriesSerializer(data=req_data)
         request_ser.is_valid(raise_exception=True)
         data = request_ser.data
 
-        try:
-            project = get_project(project_slug)
-        except NonexistentProjectException:
-            raise InvalidDataException(f"Project '{project_slug}' does not exist")
+        version = get_upload_version(project_slug, version_slug, data["api_key"])
 
-        validate_api_key(data["api_key"], project)
+        return write_entries(version, data["entries"], on_conflict)
 
-        try:
-            version = get_version(version_slug, project)
-        except NonexistentVersionException:
-            raise InvalidDataException(f"Version '{version_slug}' does not exist")
-
-        to_save: list[models.Model] = []
-        for entry in data["entries"]:
-            timestamp = entry["timestamp"]
-            git_hash = entry["git_hash"]
-            categories = entry["categories"]
-            for cat in categories:
-                try:
-                    category = get_category(cat, version)
-                except NonexistentCategoryException:
-                    raise InvalidDataException(f"Category '{cat}' does not exist")
-
-                entry = Entry(category=category, timestamp=timestamp, git_hash=git_hash)
-
-                to_save.append(entry)
-
-                for measure_type in categories[cat]:
-                    value = categories[cat][measure_type]
-                    if type(value) != int:
-                        raise InvalidDataException(
-                            f"{cat}:{measure_type} must be an integer, not {type(value): {value}}"
-                        )
-                    to_save.append(Measure(entry=entry, type=measure_type, value=value))
+    @staticmethod
+    def create_entries_from_lines(
+        stream: Optional[IO[bytes]],
+        project_slug: str,
+        version_slug: str,
+        on_conflict: OnConflict = OnConflict.ERROR,
+    ) -> dict[str, int]:
+        """
+        Writes entries uploaded as NDJSON, after a first line with the API key, a chunk at a time as
+        they're read. Each chunk is committed on its own, so an upload that fails keeps the chunks before it.
+        """
+        lines = iter_ndjson(stream) if stream is not None else iter(())
+        first = next(lines, None)
+        if first is None:
+            raise InvalidDataException("No API key provided")
+
+        request_ser = UploadHeaderSerializer(data=first[1])
+        request_ser.is_valid(raise_exception=True)
+
+        version = get_upload_version(
+            project_slug, version_slug, request_ser.validated_data["api_key"]
+        )
 
+        totals = dict.fromkeys(("wrote", "inserted", "skipped", "updated"), 0)
+        entries_done = 0
+        chunks_done = 0
         try:
-            with transaction.atomic():
-                for s in to_save:
-                    s.save()
-        except IntegrityError as e:
-            raise InvalidDataException(f"Integrity error: {e}")
+            while chunk := list(islice(lines, settings.INGEST_CHUNK_SIZE)):
+                numbers = [number for number, _ in chunk]
+                entries = validate_uploaded_entries(
+                    [entry for _, entry in chunk], numbers
+                )
+
+                counts = write_entries(version, entries, on_conflict)
+                for name, count in counts.items():
+                    totals[name] += count
+                entries_done += len(chunk)
+                chunks_done += 1
+        except APIException as e:
+            # Say how far the upload got, so it can be resumed
+            raise PartialUploadException(e, entries_done, chunks_done)
+
+        if entries_done == 0:
+            raise InvalidDataException("No entries provided")
 
-        invalidate_entries_cache(project_slug, version_slug, data)
+        return {**totals, "entries": entries_done, "chunks": chunks_done}
+
+    @staticmethod
+    def queue_entries(
+        req_data: Any,
+        project_slug: str,
+        version_slug: str,
+        on_conflict: OnConflict = OnConflict.ERROR,
+    ) -> IngestJob:
+        request_ser = QueueEntriesSerializer(data=req_data)
+        request_ser.is_valid(raise_exception=True)
+        data = request_ser.validated_data
 
-        return len(to_save)
+        version = get_upload_version(project_slug, version_slug, data["api_key"])
 
-    def get(self, request: Request, project_slug: str, version_slug: str) -> Response:
+        return IngestJob.objects.create(
+            version=version,
+            on_conflict=on_conflict.value,
+            payload=data["entries"],
+            entries_total=len(data["entries"]),
+        )
+
+    @conditional(version_change_token)
+    def get(
+        self, request: Request, project_slug: str, version_slug: str
+    ) -> HttpResponseBase:
         """
         Return the most recent entry for overall progress for a version of a project.
         """
@@ -247,40 +712,119 @@ class VersionDataView(APIView):
         except ValueError:
             raise InvalidDataException(f"Invalid mode specified: {mode_str}")
 
+        if wants_columnar(request) and mode != Mode.ALL:
+            raise InvalidDataException(
+                "The columnar format is only available for mode=all"
+            )
+
         project = get_project(project_slug)
         version = get_version(version_slug, project)
+        measure_types = parse_measure_types(request)
 
         categories_data: dict[str, list[EntryT]]
 
         match mode:
             case Mode.LATEST:
-                categories_data = {}
-                for category in Category.objects.filter(version=version):
-                    entry = get_latest_entry(project_slug, version_slug, category.slug)
-                    if entry is not None:
-                        categories_data[category.slug] = [entry]
+                latest = get_latest_entries_data(
+                    Category.objects.filter(version=version)
+                )
+                categories_data = {
+                    slug: [project_measures(entry, measure_types)]
+                    for slug, entry in latest.items()
+                }
                 response_json = {project_slug: {version_slug: categories_data}}
                 return Response(response_json)
             case Mode.ALL:
+                entries_range = parse_entries_range(request)
+                if wants_columnar(request):
+                    columns, next_cursor = get_categories_range(
+                        Category.objects.filter(version=version),
+                        entries_range or {},
+                        read=get_columnar_range,
+                        empty=empty_columns,
+                        measure_types=measure_types,
+                    )
+                    response_json = {project_slug: {version_slug: columns}}
+                    return paginated_response(request, response_json, next_cursor)
+
+                if entries_range is not None:
+                    categories_data, next_cursor = get_categories_range(
+                        Category.objects.filter(version=version),
+                        entries_range,
+                        measure_types=measure_types,
+                    )
+                    response_json = {project_slug: {version_slug: categories_data}}
+                    return paginated_response(request, response_json, next_cursor)
+
+                if wants_stream(request):
+                    return stream_all_entries(
+                        project_slug,
+                        version_slug,
+                        Category.objects.filter(version=version),
+                        measure_types,
+                    )
+
                 categories_data = {}
                 for category in Category.objects.filter(version=version):
-                    entries = get_all_entries(project_slug, version_slug, category.slug)
+                    entries = get_category_entries(category, measure_types)
                     categories_data[category.slug] = entries
                 response_json = {project_slug: {version_slug: categories_data}}
                 return Response(response_json)
+            case Mode.DOWNSAMPLE:
+                measure, points = parse_downsample(request)
+                categories_data = {}
+                for category in Category.objects.filter(version=version):
+                    categories_data[category.slug] = get_category_downsampled_entries(
+                        category, measure, points
+                    )
+                response_json = {project_slug: {version_slug: categories_data}}
+                return Response(response_json)
             case Mode.SHIELD:
                 raise InvalidDataException(
                     "Category must be specified for shield output"
                 )
 
     def post(self, request: Request, project_slug: str, version_slug: str) -> Response:
-        result = VersionDataView.create_entries(
-            request.data, project_slug, version_slug
+        on_conflict_str = self.request.query_params.get(
+            "on_conflict", OnConflict.ERROR.value
         )
 
+        try:
+            on_conflict: OnConflict = OnConflict(on_conflict_str)
+        except ValueError:
+            raise InvalidDataException(
+                f"Invalid on_conflict specified: {on_conflict_str}"
+            )
+
+        if wants_async(request):
+            if is_ndjson(request):
+                raise InvalidDataException("NDJSON uploads can't be queued")
+
+            job = VersionDataView.queue_entries(
+                request.data, project_slug, version_slug, on_conflict
+            )
+            url = request.build_absolute_uri(reverse("ingest-job", args=[job.id]))
+            return Response(
+                {"result": "queued", "job": job.id, "url": url},
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Location": url},
+            )
+
+        if is_ndjson(request):
+            # Django only reads bodies up to their Content-Length, so a chunked one would read as empty
+            if not request.META.get("CONTENT_LENGTH"):
+                raise LengthRequiredException()
+            result = VersionDataView.create_entries_from_lines(
+                request.stream, project_slug, version_slug, on_conflict
+            )
+        else:
+            result = VersionDataView.create_entries(
+                request.data, project_slug, version_slug, on_conflict
+            )
+
         success_data = {
             "result": "success",
-            "wrote": result,
+            **result,
         }
 
         return Response(success_data, status=status.HTTP_201_CREATED)
@@ -291,9 +835,12 @@ class CategoryDataView(APIView):
     API endpoint that returns data for a specific category and a version of a project.
     """
 
+    renderer_classes = [*APIView.renderer_classes, ColumnarJSONRenderer]
+
+    @conditional(category_change_token)
     def get(
         self, request: Request, project_slug: str, version_slug: str, category_slug: str
-    ) -> Response:
+    ) -> HttpResponseBase:
         """
         Return data for a specific category and a version of a project.
         """
@@ -305,14 +852,68 @@ class CategoryDataView(APIView):
         except ValueError:
             raise InvalidDataException(f"Invalid mode specified: {mode_str}")
 
+        if wants_columnar(request) and mode != Mode.ALL:
+            raise InvalidDataException(
+                "The columnar format is only available for mode=all"
+            )
+
+        measure_types = parse_measure_types(request)
+
         match mode:
             case Mode.LATEST:
-                entry = get_latest_entry(project_slug, version_slug, category_slug)
+                entry = get_latest_entry(
+                    project_slug, version_slug, category_slug, measure_types
+                )
                 entries = [entry] if entry is not None else []
                 response_json = {project_slug: {version_slug: {category_slug: entries}}}
                 return Response(response_json)
             case Mode.ALL:
-                entries = get_all_entries(project_slug, version_slug, category_slug)
+                entries_range = parse_entries_range(request)
+                if wants_columnar(request):
+                    project = get_project(project_slug)
+                    version = get_version(version_slug, project)
+                    category = get_category(category_slug, version)
+
+                    columns, next_cursor = get_categories_range(
+                        [category],
+                        entries_range or {},
+                        read=get_columnar_range,
+                        empty=empty_columns,
+                        measure_types=measure_types,
+                    )
+                    response_json = {project_slug: {version_slug: columns}}
+                    return paginated_response(request, response_json, next_cursor)
+
+                if entries_range is not None:
+                    project = get_project(project_slug)
+                    version = get_version(version_slug, project)
+                    category = get_category(category_slug, version)
+
+                    categories_data, next_cursor = get_categories_range(
+                        [category], entries_range, measure_types=measure_types
+                    )
+                    response_json = {project_slug: {version_slug: categories_data}}
+                    return paginated_response(request, response_json, next_cursor)
+
+                if wants_stream(request):
+                    category = get_current_category(
+                        project_slug, version_slug, category_slug
+                    )
+
+                    return stream_all_entries(
+                        project_slug, version_slug, [category], measure_types
+                    )
+
+                entries = get_all_entries(
+                    project_slug, version_slug, category_slug, measure_types
+                )
+                response_json = {project_slug: {version_slug: {category_slug: entries}}}
+                return Response(response_json)
+            case Mode.DOWNSAMPLE:
+                measure, points = parse_downsample(request)
+                entries = get_downsampled_entries(
+                    project_slug, version_slug, category_slug, measure, points
+                )
                 response_json = {project_slug: {version_slug: {category_slug: entries}}}
                 return Response(response_json)
             case Mode.SHIELD:
@@ -0,0 +1,42 @@
+from frog_api.exceptions import (
+    InvalidAPIKeyException,
+    MissingAPIKeyException,
+    NonexistentIngestJobException,
+)
+from frog_api.models import IngestJob
+from frog_api.serializers.model_serializers import IngestJobSerializer
+from frog_api.views.common import get_header_api_key, validate_api_key
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class IngestJobView(APIView):
+    """
+    API endpoint for following the progress of a queued upload
+    """
+
+    def get(self, request: Request, job_id: int) -> Response:
+        """
+        Get the status of an ingest job, and how many of its entries have been written so far.
+        Jobs are only shown with their project's API key, sent in the X-API-Key header. Those of other
+        projects are reported as not existing.
+        """
+        key = get_header_api_key(request)
+        if not key:
+            raise MissingAPIKeyException()
+
+        job = (
+            IngestJob.objects.select_related("version__project")
+            .filter(id=job_id)
+            .first()
+        )
+        if job is None:
+            raise NonexistentIngestJobException(job_id)
+        try:
+            validate_api_key(key, job.version.project)
+        except InvalidAPIKeyException:
+            # Jobs of other projects look like ones that don't exist, so ids can't be probed
+            raise NonexistentIngestJobException(job_id)
+
+        return Response(IngestJobSerializer(job).data)
@@ -0,0 +1,29 @@
+from frog_api.stats import get_stats, reset_stats
+from frog_api.views.common import validate_staff_or_ultimate_api_key
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class CacheStatsView(APIView):
+    """
+    API endpoint for inspecting how well the cache works
+    """
+
+    def get(self, request: Request) -> Response:
+        """
+        Get hit, miss, write, invalidation and rebuild time counts for each kind of cached data
+        """
+        validate_staff_or_ultimate_api_key(request)
+
+        return Response(get_stats())
+
+    def delete(self, request: Request) -> Response:
+        """
+        Reset all counts
+        """
+        validate_staff_or_ultimate_api_key(request)
+
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
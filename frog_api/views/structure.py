@@ -86,6 +86,8 @@ class VersionStructureView(APIView):
         version = get_version(version_slug, project)
 
         version.delete()
+        # Lets conditional requests for the project notice the deletion
+        project.save(update_fields=["last_updated"])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -142,4 +144,6 @@ class CategoryStructureView(APIView):
         category = Category.objects.get(slug=category_slug, version=version)
 
         category.delete()
+        # Lets conditional requests for the version notice the deletion
+        version.save(update_fields=["last_updated"])
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -18,6 +18,9 @@ env = environ.Env(
     CSRF_COOKIE_SECURE=(bool, True),
     STATIC_URL=(str, "/static/"),
     STATIC_ROOT=(str, BASE_DIR / "static"),
+    INGEST_BATCH_SIZE=(int, 1000),
+    INGEST_CHUNK_SIZE=(int, 500),
+    INGEST_WORKER_POLL_INTERVAL=(float, 5.0),
 )
 
 for stem in [".env.local", ".env"]:
@@ -89,6 +92,35 @@ WSGI_APPLICATION = "frogress.wsgi.application"
 
 DATABASES = {"default": env.db()}
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/ref/settings/#caches
+
+# Use a backend shared by all workers in production, e.g. dbcache://frogress_cache (after running
+# `manage.py createcachetable`) or filecache:///var/tmp/frogress
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# A few keys per category, plus rendered responses, would quickly outgrow Django's default of 300.
+# Only the backends Django culls itself take it. Memcached backends pass their options to the client,
+# which rejects it.
+if CACHES["default"]["BACKEND"] in (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.db.DatabaseCache",
+    "django.core.cache.backends.filebased.FileBasedCache",
+):
+    CACHES["default"].setdefault("OPTIONS", {}).setdefault("MAX_ENTRIES", 50000)
+
+
+# Ingest
+
+# Rows inserted per query when new entries and their measures are uploaded
+INGEST_BATCH_SIZE = env("INGEST_BATCH_SIZE")
+
+# Uploaded entries the ingest worker and NDJSON uploads write, and commit, at a time
+INGEST_CHUNK_SIZE = env("INGEST_CHUNK_SIZE")
+
+# Seconds the ingest worker waits before looking for new jobs when the queue is empty
+INGEST_WORKER_POLL_INTERVAL = env("INGEST_WORKER_POLL_INTERVAL")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -0,0 +1,18 @@
+"""
+Settings for running the tests, which `manage.py test` uses by default.
+"""
+
+from frogress.settings import *  # noqa: F401, F403
+from frogress.settings import BASE_DIR, DATABASES
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Django's in-memory test database is shared between threads with table locks that can't be waited
+    # for, so tests of concurrent requests need a file
+    DATABASES["default"].setdefault("TEST", {}).setdefault(
+        "NAME", str(BASE_DIR / "test_db.sqlite3")
+    )
+    # Concurrent requests then wait up to `timeout` seconds for each other's write locks. Taking the
+    # lock when a transaction starts keeps two transactions that have both read from failing when they
+    # both try to write.
+    DATABASES["default"].setdefault("OPTIONS", {}).setdefault("timeout", 20)
+    DATABASES["default"]["OPTIONS"].setdefault("transaction_mode", "IMMEDIATE")